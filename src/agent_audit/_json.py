@@ -0,0 +1,25 @@
+"""JSON decoding, using orjson when the optional "fast" extra is installed."""
+
+import json
+from typing import Any, Callable
+
+loads: Callable[[str | bytes], Any]
+
+try:
+    import orjson
+except ImportError:  # orjson is optional (the "fast" extra)
+    loads = json.loads
+else:
+
+    def _orjson_loads(data: str | bytes) -> Any:
+        """Decode with orjson, deferring to json.loads for input it rejects.
+
+        orjson refuses NaN/Infinity and integers wider than 64 bits, which
+        json.loads accepts, so results must not depend on the extra.
+        """
+        try:
+            return orjson.loads(data)
+        except orjson.JSONDecodeError:
+            return json.loads(data)
+
+    loads = _orjson_loads
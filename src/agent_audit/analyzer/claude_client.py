@@ -3,7 +3,6 @@
 Provides async context manager interface with lazy API key validation.
 """
 
-import json
 import os
 from typing import Optional
 
@@ -14,6 +13,8 @@ from claude_agent_sdk import (
     TextBlock,
 )
 
+from .._json import loads as _json_loads
+
 
 class AnalyzerClaudeClient:
     """Wrapper for ClaudeSDKClient for pattern classification.
@@ -108,13 +109,12 @@ class AnalyzerClaudeClient:
         """
         json_str = response.strip()
 
-        # Handle markdown code blocks
-        if "```json" in json_str or "```" in json_str:
-            start = (
-                json_str.find("```json") + len("```json")
-                if "```json" in json_str
-                else json_str.find("```") + 3
-            )
+        # Handle markdown code blocks; a ```json fence can only start at or
+        # after the first ```, so each search begins where the last one hit
+        fence = json_str.find("```")
+        if fence != -1:
+            json_fence = json_str.find("```json", fence)
+            start = json_fence + len("```json") if json_fence != -1 else fence + 3
             # Skip newline after opening fence
             if start < len(json_str) and json_str[start] == "\n":
                 start += 1
@@ -139,8 +139,8 @@ class AnalyzerClaudeClient:
         """
         try:
             json_str = AnalyzerClaudeClient.extract_json(response)
-            return json.loads(json_str)
-        except json.JSONDecodeError as e:
+            return _json_loads(json_str)
+        except ValueError as e:
             raise ValueError(
                 f"Failed to parse JSON response from Claude: {e}\n"
                 f"Response:\n{response[:500]}..."
@@ -19,6 +19,15 @@ class RecommendationCategory(str, Enum):
     PROMPT = "prompt"  # User prompting improvements
 
 
+_CATEGORIES_BY_VALUE = {category.value: category for category in RecommendationCategory}
+
+
+def _slugify(title: str) -> str:
+    """Turn a recommendation title into a filename slug."""
+    slug = title.lower().replace(" ", "-").replace("/", "-")
+    return "".join(c for c in slug if c.isalnum() or c == "-")
+
+
 @dataclass
 class Recommendation:
     """A single actionable recommendation from analysis.
@@ -46,23 +55,74 @@ class Recommendation:
     @property
     def output_filename(self) -> str:
         """Generate appropriate filename based on category."""
-        slug = self.title.lower().replace(" ", "-").replace("/", "-")
-        slug = "".join(c for c in slug if c.isalnum() or c == "-")
-
         match self.category:
             case RecommendationCategory.CLAUDE_MD:
                 return "claude-md-additions.md"
             case RecommendationCategory.SKILL:
-                name = self.metadata.get("skill_name", slug)
+                if "skill_name" in self.metadata:
+                    name = self.metadata["skill_name"]
+                else:
+                    name = _slugify(self.title)
                 return f"skill-{name}.md"
             case RecommendationCategory.HOOK:
-                return f"hook-{slug}.md"
+                return f"hook-{_slugify(self.title)}.md"
             case RecommendationCategory.MCP:
-                return f"mcp-{slug}.md"
+                return f"mcp-{_slugify(self.title)}.md"
             case RecommendationCategory.WORKFLOW:
-                return f"workflow-{slug}.md"
+                return f"workflow-{_slugify(self.title)}.md"
             case RecommendationCategory.PROMPT:
-                return f"prompt-{slug}.md"
+                return f"prompt-{_slugify(self.title)}.md"
+
+
+def _find_toml_block_end(content: str, block_start: int) -> int:
+    """Return the index of the ``\n```` closing a TOML block, or -1.
+
+    A ``` only closes the block outside triple-quoted strings, and only when
+    it isn't a language specifier such as ```python. Rather than stepping a
+    character at a time, jump between the next triple quote and the next
+    fence candidate with str.find.
+    """
+    pos = block_start
+    in_triple_quote = False
+
+    while True:
+        quote = content.find('"""', pos)
+        if in_triple_quote:
+            if quote == -1:
+                return -1
+            in_triple_quote = False
+            pos = quote + 3
+            continue
+
+        # Any fence before the next opening triple quote can close the block
+        fence = content.find("\n```", pos)
+        while fence != -1 and (quote == -1 or fence < quote):
+            after_fence = fence + 4
+            if after_fence >= len(content) or not content[after_fence].isalpha():
+                return fence
+            fence = content.find("\n```", fence + 1)
+
+        if quote == -1:
+            return -1
+        in_triple_quote = True
+        pos = quote + 3
+
+
+def find_toml_block_span(content: str) -> Optional[tuple[int, int]]:
+    """Locate the first complete TOML block in markdown content.
+
+    Returns (index of the opening ```toml fence, index of the newline before
+    the closing fence), or None when there is no complete block. Embedded ```
+    in multi-line strings are skipped as in _extract_toml_blocks.
+    """
+    toml_start = content.find("```toml\n")
+    if toml_start == -1:
+        return None
+
+    toml_end = _find_toml_block_end(content, toml_start + 8)
+    if toml_end == -1:
+        return None
+    return toml_start, toml_end
 
 
 def _extract_toml_blocks(content: str) -> list[str]:
@@ -88,34 +148,7 @@ def _extract_toml_blocks(content: str) -> list[str]:
             break
 
         block_start = start + 8  # Skip past "```toml\n"
-
-        # Scan through the content tracking triple-quote state
-        # We're looking for ``` that's NOT inside a """ string
-        scan_pos = block_start
-        in_triple_quote = False
-        end = -1
-
-        while scan_pos < len(content):
-            # Check for triple quote (""")
-            if content[scan_pos : scan_pos + 3] == '"""':
-                in_triple_quote = not in_triple_quote
-                scan_pos += 3
-                continue
-
-            # Check for closing fence ``` (only valid if not in triple quote)
-            if not in_triple_quote and content[scan_pos : scan_pos + 4] == "\n```":
-                # Verify this isn't a language specifier like ```python
-                after_fence = scan_pos + 4
-                if after_fence >= len(content):
-                    end = scan_pos
-                    break
-                next_char = content[after_fence]
-                if not next_char.isalpha():
-                    # This is the closing fence
-                    end = scan_pos
-                    break
-
-            scan_pos += 1
+        end = _find_toml_block_end(content, block_start)
 
         if end != -1:
             blocks.append(content[block_start:end])
@@ -176,9 +209,13 @@ def parse_recommendations_from_synthesis(synthesis_path: Path) -> list[Recommend
 
     recommendations = []
     for rec_data in all_recommendations_data:
-        try:
-            category = RecommendationCategory(rec_data.get("category", "workflow"))
-        except ValueError:
+        # Unknown (or non-string) categories fall back to workflow
+        category = rec_data.get("category", "workflow")
+        if isinstance(category, str):
+            category = _CATEGORIES_BY_VALUE.get(
+                category, RecommendationCategory.WORKFLOW
+            )
+        else:
             category = RecommendationCategory.WORKFLOW
 
         rec = Recommendation(
@@ -226,6 +263,25 @@ class RecommendationGenerator:
 
         return generated
 
+    def _write(self, rec: Recommendation, parts: list[str]) -> Path:
+        """Join the rendered parts and write them to the recommendation's file."""
+        path = self.output_dir / rec.output_filename
+        path.write_text("".join(parts))
+        return path
+
+    @staticmethod
+    def _append_evidence(parts: list[str], rec: Recommendation) -> None:
+        """Append the evidence bullet list."""
+        parts.extend(f"- {e}\n" for e in rec.evidence)
+
+    @staticmethod
+    def _append_impact(parts: list[str], rec: Recommendation) -> None:
+        """Append the estimated impact section, if there is one."""
+        if rec.estimated_impact:
+            parts.append(
+                f"\n## Estimated Impact\n\n~{rec.estimated_impact:,} tokens saved\n"
+            )
+
     def _generate_one(self, rec: Recommendation) -> Optional[Path]:
         """Generate output for a single recommendation."""
         match rec.category:
@@ -244,7 +300,8 @@ class RecommendationGenerator:
 
     def _generate_claude_md(self, rec: Recommendation) -> Path:
         """Generate CLAUDE.md snippet recommendation."""
-        output = f"""# CLAUDE.md Addition: {rec.title}
+        parts = [
+            f"""# CLAUDE.md Addition: {rec.title}
 
 ## Recommendation
 
@@ -259,23 +316,18 @@ class RecommendationGenerator:
 ## Evidence
 
 """
-        for e in rec.evidence:
-            output += f"- {e}\n"
-
-        if rec.estimated_impact:
-            output += (
-                f"\n## Estimated Impact\n\n~{rec.estimated_impact:,} tokens saved\n"
-            )
+        ]
+        self._append_evidence(parts, rec)
+        self._append_impact(parts, rec)
 
-        path = self.output_dir / rec.output_filename
-        path.write_text(output)
-        return path
+        return self._write(rec, parts)
 
     def _generate_skill(self, rec: Recommendation) -> Path:
         """Generate skill definition file."""
         skill_name = rec.metadata.get("skill_name", "custom-skill")
 
-        output = f"""# Skill Recommendation: /{skill_name}
+        parts = [
+            f"""# Skill Recommendation: /{skill_name}
 
 ## Description
 
@@ -292,21 +344,16 @@ Create `.claude/skills/{skill_name}/SKILL.md`:
 ## Evidence
 
 """
-        for e in rec.evidence:
-            output += f"- {e}\n"
-
-        if rec.estimated_impact:
-            output += (
-                f"\n## Estimated Impact\n\n~{rec.estimated_impact:,} tokens saved\n"
-            )
+        ]
+        self._append_evidence(parts, rec)
+        self._append_impact(parts, rec)
 
-        path = self.output_dir / rec.output_filename
-        path.write_text(output)
-        return path
+        return self._write(rec, parts)
 
     def _generate_hook(self, rec: Recommendation) -> Path:
         """Generate hook configuration recommendation."""
-        output = f"""# Hook Recommendation: {rec.title}
+        parts = [
+            f"""# Hook Recommendation: {rec.title}
 
 ## Description
 
@@ -323,17 +370,14 @@ Add to `.claude/settings.json`:
 ## Evidence
 
 """
-        for e in rec.evidence:
-            output += f"- {e}\n"
-
-        if rec.estimated_impact:
-            output += (
-                f"\n## Estimated Impact\n\n~{rec.estimated_impact:,} tokens saved\n"
-            )
+        ]
+        self._append_evidence(parts, rec)
+        self._append_impact(parts, rec)
 
         # Check for helper script in metadata
         if helper_script := rec.metadata.get("helper_script"):
-            output += f"""
+            parts.append(
+                f"""
 ## Helper Script
 
 {rec.metadata.get("helper_script_path", "Create helper script")}:
@@ -342,14 +386,14 @@ Add to `.claude/settings.json`:
 {helper_script}
 ```
 """
+            )
 
-        path = self.output_dir / rec.output_filename
-        path.write_text(output)
-        return path
+        return self._write(rec, parts)
 
     def _generate_mcp(self, rec: Recommendation) -> Path:
         """Generate MCP server recommendation."""
-        output = f"""# MCP Server Recommendation: {rec.title}
+        parts = [
+            f"""# MCP Server Recommendation: {rec.title}
 
 ## Description
 
@@ -364,26 +408,23 @@ Add to `.claude/settings.json`:
 ## Evidence
 
 """
-        for e in rec.evidence:
-            output += f"- {e}\n"
+        ]
+        self._append_evidence(parts, rec)
 
         if env_vars := rec.metadata.get("env_vars"):
-            output += "\n## Required Environment Variables\n\n"
-            for var, desc in env_vars.items():
-                output += f"- `{var}`: {desc}\n"
+            parts.append("\n## Required Environment Variables\n\n")
+            parts.extend(f"- `{var}`: {desc}\n" for var, desc in env_vars.items())
 
         if usage := rec.metadata.get("usage_examples"):
-            output += "\n## Example Usage\n\n"
-            for example in usage:
-                output += f"- {example}\n"
+            parts.append("\n## Example Usage\n\n")
+            parts.extend(f"- {example}\n" for example in usage)
 
-        path = self.output_dir / rec.output_filename
-        path.write_text(output)
-        return path
+        return self._write(rec, parts)
 
     def _generate_workflow(self, rec: Recommendation) -> Path:
         """Generate workflow guideline recommendation."""
-        output = f"""# Workflow Recommendation: {rec.title}
+        parts = [
+            f"""# Workflow Recommendation: {rec.title}
 
 ## Description
 
@@ -396,21 +437,16 @@ Add to `.claude/settings.json`:
 ## Evidence
 
 """
-        for e in rec.evidence:
-            output += f"- {e}\n"
+        ]
+        self._append_evidence(parts, rec)
+        self._append_impact(parts, rec)
 
-        if rec.estimated_impact:
-            output += (
-                f"\n## Estimated Impact\n\n~{rec.estimated_impact:,} tokens saved\n"
-            )
-
-        path = self.output_dir / rec.output_filename
-        path.write_text(output)
-        return path
+        return self._write(rec, parts)
 
     def _generate_prompt(self, rec: Recommendation) -> Path:
         """Generate prompt improvement recommendation."""
-        output = f"""# Prompt Improvement: {rec.title}
+        parts = [
+            f"""# Prompt Improvement: {rec.title}
 
 ## Description
 
@@ -423,9 +459,7 @@ Add to `.claude/settings.json`:
 ## Evidence
 
 """
-        for e in rec.evidence:
-            output += f"- {e}\n"
+        ]
+        self._append_evidence(parts, rec)
 
-        path = self.output_dir / rec.output_filename
-        path.write_text(output)
-        return path
+        return self._write(rec, parts)
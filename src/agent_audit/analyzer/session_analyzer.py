@@ -1,7 +1,10 @@
 """Session analyzer for per-project analysis using Claude."""
 
+from functools import lru_cache
 from pathlib import Path
-from typing import Protocol
+from typing import Optional, Protocol
+
+PROMPTS_DIR = Path(__file__).parent.parent / "prompts"
 
 
 class ClaudeClient(Protocol):
@@ -28,14 +31,19 @@ class DatabaseProtocol(Protocol):
         ...
 
 
+@lru_cache(maxsize=None)
+def load_prompt(name: str) -> str:
+    """Read a prompt file from the prompts directory, once per process."""
+    return (PROMPTS_DIR / name).read_text(encoding="utf-8")
+
+
 def load_session_analysis_template() -> str:
     """Load the session analysis prompt template.
 
     Returns:
         The template string with placeholders.
     """
-    template_path = Path(__file__).parent.parent / "prompts" / "session_analysis.md"
-    return template_path.read_text()
+    return load_prompt("session_analysis.md")
 
 
 def load_global_synthesis_template() -> str:
@@ -44,8 +52,7 @@ def load_global_synthesis_template() -> str:
     Returns:
         The template string with placeholders.
     """
-    template_path = Path(__file__).parent.parent / "prompts" / "global_synthesis.md"
-    return template_path.read_text()
+    return load_prompt("global_synthesis.md")
 
 
 def load_best_practices_reference() -> str:
@@ -54,10 +61,7 @@ def load_best_practices_reference() -> str:
     Returns:
         The best practices reference content.
     """
-    template_path = (
-        Path(__file__).parent.parent / "prompts" / "best_practices_reference.md"
-    )
-    return template_path.read_text()
+    return load_prompt("best_practices_reference.md")
 
 
 def load_validation_template() -> str:
@@ -66,10 +70,7 @@ def load_validation_template() -> str:
     Returns:
         The template string with placeholders.
     """
-    template_path = (
-        Path(__file__).parent.parent / "prompts" / "best_practices_validation.md"
-    )
-    return template_path.read_text()
+    return load_prompt("best_practices_validation.md")
 
 
 def build_validation_prompt(synthesis_content: str) -> str:
@@ -95,8 +96,7 @@ def load_fix_template() -> str:
     Returns:
         The template string with placeholders.
     """
-    template_path = Path(__file__).parent.parent / "prompts" / "recommendation_fix.md"
-    return template_path.read_text()
+    return load_prompt("recommendation_fix.md")
 
 
 def build_fix_prompt(original_toml: str, validation_issues: str) -> str:
@@ -224,21 +224,35 @@ class SessionAnalyzer:
         self.client = client
         self.db = db
         self.toml_dir = toml_dir
-
-    async def analyze_project(self, project: str) -> str:
+        # Global percentiles span every session, so they are the same for each
+        # project in a run; fetched on first use
+        self._global_percentiles: Optional[dict] = None
+
+    def _get_global_percentiles(self) -> dict:
+        """Get global percentiles, querying the database once per analyzer."""
+        if self._global_percentiles is None:
+            self._global_percentiles = self.db.get_global_percentiles()
+        return self._global_percentiles
+
+    async def analyze_project(
+        self, project: str, metrics: Optional[dict] = None
+    ) -> str:
         """Analyze sessions for a single project.
 
         Args:
             project: Project name to analyze
+            metrics: Project metrics if the caller already fetched them
+                (from get_project_metrics); queried when omitted
 
         Returns:
             Markdown analysis content.
         """
         # Get project metrics from database
-        metrics = self.db.get_project_metrics(project)
+        if metrics is None:
+            metrics = self.db.get_project_metrics(project)
 
         # Get global percentiles and project-specific stats
-        global_percentiles = self.db.get_global_percentiles()
+        global_percentiles = self._get_global_percentiles()
         project_stats = self.db.get_project_session_stats(project)
 
         # Build the prompt
@@ -1,13 +1,17 @@
 """CLI for Agent Audit."""
 
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
 from datetime import datetime
+from itertools import islice
 from pathlib import Path
-from typing import Optional
+from typing import Callable, Iterator, Optional
 
 import click
 
 from .config import Config
 from .database import Database
+from .models import Session
 from .parser import (
     discover_sessions as discover_claude_sessions,
     get_project_name_from_dir,
@@ -78,6 +82,13 @@ def main(ctx, config: Optional[Path]):
     default="all",
     help="Which agent source to sync (default: all)",
 )
+@click.option(
+    "--jobs",
+    "-j",
+    type=click.IntRange(min=1),
+    default=1,
+    help="Number of processes used to parse session files (default: 1)",
+)
 @click.pass_context
 def sync(
     ctx,
@@ -88,6 +99,7 @@ def sync(
     no_toml: bool,
     include_warmup: bool,
     source: str,
+    jobs: int,
 ):
     """Sync sessions from Claude Code and Codex to the archive."""
     cfg: Config = ctx.obj["config"]
@@ -111,7 +123,7 @@ def sync(
         if source in ("all", "claude-code"):
             click.echo("=== Syncing Claude Code sessions ===")
             claude_synced, claude_skipped, claude_errors, claude_tmp, claude_warmup = _sync_claude_sessions(
-                db, cfg, project, include_tmp_directories, include_warmup, no_toml
+                db, cfg, project, include_tmp_directories, include_warmup, no_toml, jobs
             )
             synced += claude_synced
             skipped += claude_skipped
@@ -125,7 +137,7 @@ def sync(
             codex_home = get_codex_home()
             if codex_home.exists():
                 codex_synced, codex_skipped, codex_errors, codex_warmup = _sync_codex_sessions(
-                    db, cfg, project, include_warmup, no_toml
+                    db, cfg, project, include_warmup, no_toml, jobs
                 )
                 synced += codex_synced
                 skipped += codex_skipped
@@ -150,6 +162,44 @@ def sync(
         click.echo(f"  Output tokens: {stats['total_output_tokens']:,}")
 
 
+def _parse_in_order(
+    parse: Callable[[Path, str], Session],
+    files: list[tuple[Path, str]],
+    jobs: int,
+) -> Iterator[tuple[Path, Optional[Session], Optional[Exception]]]:
+    """Parse (file_path, project_name) pairs, yielding (file_path, session, error).
+
+    Results come back in input order. With jobs > 1 the files are parsed in a
+    process pool while the caller inserts and renders, which stays in this
+    process.
+    """
+    if jobs == 1:
+        for file_path, proj_name in files:
+            try:
+                yield file_path, parse(file_path, proj_name), None
+            except Exception as e:
+                yield file_path, None, e
+        return
+
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        # Keep at most jobs * 2 files in flight so parsed sessions do not pile
+        # up in memory while the caller is still inserting earlier ones
+        queued = iter(files)
+        pending: deque[tuple[Path, Future[Session]]] = deque(
+            (item[0], executor.submit(parse, *item))
+            for item in islice(queued, jobs * 2)
+        )
+        while pending:
+            file_path, future = pending.popleft()
+            item = next(queued, None)
+            if item is not None:
+                pending.append((item[0], executor.submit(parse, *item)))
+            try:
+                yield file_path, future.result(), None
+            except Exception as e:
+                yield file_path, None, e
+
+
 def _sync_claude_sessions(
     db: Database,
     cfg: Config,
@@ -157,6 +207,7 @@ def _sync_claude_sessions(
     include_tmp_directories: bool,
     include_warmup: bool,
     no_toml: bool,
+    jobs: int = 1,
 ) -> tuple[int, int, int, int, int]:
     """Sync Claude Code sessions. Returns (synced, skipped, errors, tmp_skipped, warmup_skipped)."""
     synced = 0
@@ -165,6 +216,7 @@ def _sync_claude_sessions(
     tmp_skipped = 0
     warmup_skipped = 0
 
+    files = []
     for jsonl_file, proj_name in discover_claude_sessions(cfg.projects_dir):
         # Get better project name from directory
         proj_name = get_project_name_from_dir(jsonl_file.parent.name)
@@ -178,9 +230,14 @@ def _sync_claude_sessions(
         if project and proj_name != project:
             continue
 
+        files.append((jsonl_file, proj_name))
+
+    for jsonl_file, session, error in _parse_in_order(parse_claude_session, files, jobs):
         try:
             click.echo(f"  Parsing {jsonl_file.name}...", nl=False)
-            session = parse_claude_session(jsonl_file, proj_name)
+            if error is not None:
+                raise error
+            assert session is not None
 
             # Skip sessions with no messages
             if not session.messages:
@@ -216,6 +273,7 @@ def _sync_codex_sessions(
     project: Optional[str],
     include_warmup: bool,
     no_toml: bool,
+    jobs: int = 1,
 ) -> tuple[int, int, int, int]:
     """Sync Codex sessions. Returns (synced, skipped, errors, warmup_skipped)."""
     synced = 0
@@ -223,14 +281,19 @@ def _sync_codex_sessions(
     errors = 0
     warmup_skipped = 0
 
-    for rollout_file, proj_name in discover_codex_sessions():
-        # Filter by project if specified
-        if project and proj_name != project:
-            continue
+    # Filter by project if specified
+    files = [
+        (rollout_file, proj_name)
+        for rollout_file, proj_name in discover_codex_sessions()
+        if not project or proj_name == project
+    ]
 
+    for rollout_file, session, error in _parse_in_order(parse_codex_session, files, jobs):
         try:
             click.echo(f"  Parsing {rollout_file.name}...", nl=False)
-            session = parse_codex_session(rollout_file, proj_name)
+            if error is not None:
+                raise error
+            assert session is not None
 
             # Skip sessions with no messages
             if not session.messages:
@@ -317,8 +380,7 @@ def render(
         # Get sessions to render
         if session_id:
             # Find session by prefix match
-            all_sessions = db.get_all_sessions()
-            sessions = [s for s in all_sessions if s["id"].startswith(session_id)]
+            sessions = db.get_sessions_by_id_prefix(session_id)
             if not sessions:
                 click.echo(f"No session found matching '{session_id}'")
                 return
@@ -355,6 +417,7 @@ def render(
                     )
                 )
 
+            messages_by_id = {message.id: message for message in messages}
             tool_calls = []
             for tc in db.get_tool_calls_for_session(session_dict["id"]):
                 tool_call = ToolCall(
@@ -367,10 +430,9 @@ def render(
                 )
                 tool_calls.append(tool_call)
                 # Attach to message
-                for message in messages:
-                    if message.id == tc["message_id"]:
-                        message.tool_calls.append(tool_call)
-                        break
+                message = messages_by_id.get(tc["message_id"])
+                if message is not None:
+                    message.tool_calls.append(tool_call)
 
             tool_results = []
             for tr in db.get_tool_results_for_session(session_dict["id"]):
@@ -596,7 +658,7 @@ def _run_session_analysis(ctx, cfg: Config):
                     )
 
                     try:
-                        result = await analyzer.analyze_project(project)
+                        result = await analyzer.analyze_project(project, metrics)
 
                         # Write output
                         output_path = run_dir / f"{project}.md"
@@ -674,74 +736,26 @@ def _format_validation_issues(data: dict) -> str:
 
 def _extract_toml_from_synthesis(synthesis_content: str) -> Optional[str]:
     """Extract the TOML block from synthesis markdown."""
-    toml_start = synthesis_content.find("```toml\n")
-    if toml_start == -1:
-        return None
-
-    # Find the end - need to handle embedded ``` in multi-line strings
-    # Use triple-quote tracking like the recommendations parser
-    block_start = toml_start + 8
-    scan_pos = block_start
-    in_triple_quote = False
-
-    while scan_pos < len(synthesis_content):
-        if synthesis_content[scan_pos : scan_pos + 3] == '"""':
-            in_triple_quote = not in_triple_quote
-            scan_pos += 3
-            continue
-
-        if (
-            not in_triple_quote
-            and synthesis_content[scan_pos : scan_pos + 4] == "\n```"
-        ):
-            after_fence = scan_pos + 4
-            if (
-                after_fence >= len(synthesis_content)
-                or not synthesis_content[after_fence].isalpha()
-            ):
-                return synthesis_content[block_start:scan_pos]
-
-        scan_pos += 1
+    from .analyzer.recommendations import find_toml_block_span
 
-    return None
+    span = find_toml_block_span(synthesis_content)
+    if span is None:
+        return None
+    toml_start, toml_end = span
+    return synthesis_content[toml_start + 8 : toml_end]
 
 
 def _replace_toml_in_synthesis(synthesis_content: str, new_toml: str) -> str:
     """Replace the TOML block in synthesis with new content."""
-    toml_start = synthesis_content.find("```toml\n")
-    if toml_start == -1:
-        return synthesis_content
-
-    # Find the end using same logic as extract
-    block_start = toml_start + 8
-    scan_pos = block_start
-    in_triple_quote = False
+    from .analyzer.recommendations import find_toml_block_span
 
-    while scan_pos < len(synthesis_content):
-        if synthesis_content[scan_pos : scan_pos + 3] == '"""':
-            in_triple_quote = not in_triple_quote
-            scan_pos += 3
-            continue
-
-        if (
-            not in_triple_quote
-            and synthesis_content[scan_pos : scan_pos + 4] == "\n```"
-        ):
-            after_fence = scan_pos + 4
-            if (
-                after_fence >= len(synthesis_content)
-                or not synthesis_content[after_fence].isalpha()
-            ):
-                # Found the end
-                toml_end = scan_pos
-                # Reconstruct with new TOML
-                before = synthesis_content[:toml_start]
-                after = synthesis_content[toml_end + 4 :]  # Skip \n```
-                return f"{before}```toml\n{new_toml}\n```{after}"
-
-        scan_pos += 1
-
-    return synthesis_content
+    span = find_toml_block_span(synthesis_content)
+    if span is None:
+        return synthesis_content
+    toml_start, toml_end = span
+    before = synthesis_content[:toml_start]
+    after = synthesis_content[toml_end + 4 :]  # Skip \n```
+    return f"{before}```toml\n{new_toml}\n```{after}"
 
 
 def _summarize_validation(validation_content: str) -> tuple[Optional[dict], bool]:
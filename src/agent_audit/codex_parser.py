@@ -7,12 +7,12 @@ import uuid
 from pathlib import Path
 from typing import Any, Iterator
 
+from ._json import loads as _json_loads
 from .models import (
     Commit,
     COMMIT_PATTERN,
     REPO_PUSH_PATTERN,
-    REPO_URL_PATTERN,
-    detect_platform,
+    parse_repo_url,
     Message,
     Session,
     ToolCall,
@@ -25,11 +25,18 @@ DEFAULT_CODEX_HOME = "~/.codex"
 CODEX_SESSIONS_SUBDIR = "sessions"
 CODEX_ARCHIVED_SESSIONS_SUBDIR = "archived_sessions"
 
-# Pattern: rollout-YYYY-MM-DDThh-mm-ss-UUID.jsonl
+# Pattern: rollout-YYYY-MM-DDThh-mm-ss-UUID.jsonl (only the UUID is captured)
 ROLLOUT_FILENAME_RE = re.compile(
-    r"^rollout-(?P<ts>.+)-(?P<uuid>[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12})\.jsonl$"
+    r"^rollout-.+-(?P<uuid>[0-9a-fA-F]{8}-(?:[0-9a-fA-F]{4}-){3}[0-9a-fA-F]{12})\.jsonl$"
 )
 
+# response_item payload types, checked once per rollout line
+TOOL_CALL_ITEM_TYPES = frozenset(
+    {"function_call", "custom_tool_call", "local_shell_call"}
+)
+TOOL_OUTPUT_ITEM_TYPES = frozenset({"function_call_output", "custom_tool_call_output"})
+TEXT_CONTENT_TYPES = frozenset({"input_text", "output_text"})
+
 
 def get_codex_home() -> Path:
     """Get Codex home directory from env or default."""
@@ -59,27 +66,51 @@ def discover_codex_sessions(
 
 def _iter_rollout_files_with_project(base_dir: Path) -> Iterator[tuple[Path, str]]:
     """Iterate rollout files and extract project names from metadata."""
-    for rollout_file in base_dir.rglob("rollout-*.jsonl"):
+    for rollout_file in _scan_rollout_files(base_dir):
         project_name = _extract_project_from_rollout(rollout_file)
         yield rollout_file, project_name
 
 
+def _scan_rollout_files(base_dir: Path) -> Iterator[Path]:
+    """Yield rollout-*.jsonl files under base_dir, walking it with os.scandir.
+
+    scandir reports each entry's type from the directory listing itself, so
+    the date-nested session tree is walked without a stat call per entry.
+    Unreadable directories are skipped and directory symlinks are not
+    followed, as Path.rglob does, so a link back up the tree cannot loop.
+    """
+    subdirs: list[str] = []
+    try:
+        with os.scandir(base_dir) as entries:
+            for entry in entries:
+                name = entry.name
+                if entry.is_dir(follow_symlinks=False):
+                    subdirs.append(entry.path)
+                elif name.startswith("rollout-") and name.endswith(".jsonl"):
+                    yield Path(entry.path)
+    except OSError:
+        return
+    for subdir in subdirs:
+        yield from _scan_rollout_files(Path(subdir))
+
+
 def _extract_project_from_rollout(rollout_path: Path) -> str:
     """Extract project name from rollout file's session_meta cwd."""
     try:
-        with open(rollout_path, "r", encoding="utf-8") as f:
+        with open(rollout_path, "rb") as f:
             for line in f:
                 line = line.strip()
                 if not line:
                     continue
                 try:
-                    obj = json.loads(line)
+                    obj = _json_loads(line)
                     if obj.get("type") == "session_meta":
                         payload = obj.get("payload", {})
                         cwd = payload.get("cwd")
                         if cwd:
                             return Path(cwd).name
-                except json.JSONDecodeError:
+                except ValueError:
+                    # JSONDecodeError, or UnicodeDecodeError for invalid UTF-8
                     continue
                 # Only check first few lines for metadata
                 break
@@ -211,7 +242,7 @@ def parse_codex_session(file_path: Path, project_name: str) -> Session:
             item_type = payload.get("type")
 
             # Tool calls
-            if item_type in ("function_call", "custom_tool_call", "local_shell_call"):
+            if item_type in TOOL_CALL_ITEM_TYPES:
                 msg_id = str(uuid.uuid4())
                 call_id = payload.get("call_id", "")
                 name = payload.get("name") or item_type
@@ -249,7 +280,7 @@ def parse_codex_session(file_path: Path, project_name: str) -> Session:
                 continue
 
             # Tool results
-            if item_type in ("function_call_output", "custom_tool_call_output"):
+            if item_type in TOOL_OUTPUT_ITEM_TYPES:
                 call_id = payload.get("call_id", "")
                 output = payload.get("output", "")
                 is_error = False
@@ -382,13 +413,9 @@ def _process_session_meta(session: Session, payload: dict) -> None:
             session.git_branch = git_info.get("branch")
         repo_url = git_info.get("repository_url")
         if isinstance(repo_url, str):
-            match = REPO_URL_PATTERN.search(repo_url)
-            if match:
-                hostname = match.group(1)
-                path = match.group(2)
-                platform = detect_platform(hostname)
-                session.repo = path
-                session.repo_platform = platform
+            parsed = parse_repo_url(repo_url)
+            if parsed:
+                session.repo, session.repo_platform = parsed
 
 
 def _extract_text_from_content(content: Any) -> str:
@@ -399,7 +426,7 @@ def _extract_text_from_content(content: Any) -> str:
     for item in content:
         if not isinstance(item, dict):
             continue
-        if item.get("type") in ("input_text", "output_text"):
+        if item.get("type") in TEXT_CONTENT_TYPES:
             text = item.get("text")
             if isinstance(text, str) and text.strip():
                 parts.append(text.strip())
@@ -409,17 +436,18 @@ def _extract_text_from_content(content: Any) -> str:
 def _iter_rollout_objects(path: Path) -> Iterator[dict]:
     """Iterate over JSONL objects in a rollout file."""
     try:
-        with open(path, "r", encoding="utf-8") as f:
+        with open(path, "rb") as f:
             for line in f:
                 line = line.strip()
                 if not line:
                     continue
                 try:
-                    obj = json.loads(line)
-                    if isinstance(obj, dict):
-                        yield obj
-                except json.JSONDecodeError:
+                    obj = _json_loads(line)
+                except ValueError:
+                    # JSONDecodeError, or UnicodeDecodeError for invalid UTF-8
                     continue
+                if isinstance(obj, dict):
+                    yield obj
     except OSError:
         return
 
@@ -2,7 +2,7 @@
 
 import sqlite3
 from pathlib import Path
-from typing import Optional
+from typing import Any, Iterable, Optional
 
 from .models import Session
 
@@ -77,15 +77,23 @@ CREATE TABLE IF NOT EXISTS commits (
 );
 """
 
-# Indexes - run after migrations so columns exist
+# Indexes - run after migrations so columns exist.
+# Per-session and per-project lookups are read back in time order, so their
+# indexes carry the sort column too and SQLite can skip the ORDER BY sort.
+# The single-column indexes they replace are dropped from older archives.
 SCHEMA_INDEXES = """
-CREATE INDEX IF NOT EXISTS idx_messages_session ON messages(session_id);
+DROP INDEX IF EXISTS idx_messages_session;
+DROP INDEX IF EXISTS idx_tool_calls_session;
+DROP INDEX IF EXISTS idx_tool_results_session;
+DROP INDEX IF EXISTS idx_sessions_project;
+DROP INDEX IF EXISTS idx_sessions_parent;
+CREATE INDEX IF NOT EXISTS idx_messages_session_ts ON messages(session_id, timestamp);
 CREATE INDEX IF NOT EXISTS idx_messages_timestamp ON messages(timestamp);
-CREATE INDEX IF NOT EXISTS idx_tool_calls_session ON tool_calls(session_id);
-CREATE INDEX IF NOT EXISTS idx_tool_results_session ON tool_results(session_id);
-CREATE INDEX IF NOT EXISTS idx_sessions_project ON sessions(project);
+CREATE INDEX IF NOT EXISTS idx_tool_calls_session_ts ON tool_calls(session_id, timestamp);
+CREATE INDEX IF NOT EXISTS idx_tool_results_session_ts ON tool_results(session_id, timestamp);
+CREATE INDEX IF NOT EXISTS idx_sessions_project_started ON sessions(project, started_at);
 CREATE INDEX IF NOT EXISTS idx_sessions_started ON sessions(started_at);
-CREATE INDEX IF NOT EXISTS idx_sessions_parent ON sessions(parent_session_id);
+CREATE INDEX IF NOT EXISTS idx_sessions_parent_started ON sessions(parent_session_id, started_at);
 CREATE INDEX IF NOT EXISTS idx_sessions_github_repo ON sessions(github_repo);
 CREATE INDEX IF NOT EXISTS idx_sessions_repo ON sessions(repo);
 CREATE INDEX IF NOT EXISTS idx_sessions_agent_type ON sessions(agent_type);
@@ -93,6 +101,17 @@ CREATE INDEX IF NOT EXISTS idx_commits_session ON commits(session_id);
 CREATE INDEX IF NOT EXISTS idx_commits_hash ON commits(commit_hash);
 """
 
+# Per-connection settings. WAL turns each commit into an append to the log,
+# and synchronous=NORMAL only fsyncs at checkpoints (safe in WAL mode; a power
+# loss can drop the last commits but never corrupts the archive). An
+# in-memory database ignores journal_mode=WAL and stays in memory mode.
+CONNECTION_PRAGMAS = """
+PRAGMA journal_mode = WAL;
+PRAGMA synchronous = NORMAL;
+PRAGMA temp_store = MEMORY;
+PRAGMA cache_size = -64000;
+"""
+
 # Migrations for existing databases (columns added in Phase 1)
 MIGRATIONS = [
     "ALTER TABLE sessions ADD COLUMN slug TEXT",
@@ -133,6 +152,50 @@ MIGRATIONS = [
 ]
 
 
+# Row writers, kept as constants so each statement text is built once and
+# sqlite3's statement cache hands back the same prepared statement.
+SESSION_INSERT_SQL = """
+INSERT OR REPLACE INTO sessions
+(id, project, agent_type, cwd, git_branch, slug, summary, title, parent_session_id, started_at, ended_at,
+ claude_version, total_input_tokens, total_output_tokens, total_cache_read_tokens, model,
+ is_warmup, is_sidechain, github_repo, repo, repo_platform, session_context)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+MESSAGE_INSERT_SQL = """
+INSERT OR IGNORE INTO messages
+(id, session_id, parent_uuid, type, timestamp, content, thinking, model,
+ stop_reason, input_tokens, output_tokens, is_sidechain, is_compact_summary, has_images)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+TOOL_CALL_INSERT_SQL = """
+INSERT OR IGNORE INTO tool_calls
+(id, message_id, session_id, tool_name, input_json, timestamp)
+VALUES (?, ?, ?, ?, ?, ?)
+"""
+
+TOOL_RESULT_INSERT_SQL = """
+INSERT OR IGNORE INTO tool_results
+(id, tool_call_id, session_id, content, is_error, timestamp)
+VALUES (?, ?, ?, ?, ?, ?)
+"""
+
+COMMIT_INSERT_SQL = """
+INSERT OR IGNORE INTO commits
+(id, session_id, commit_hash, message, timestamp)
+VALUES (?, ?, ?, ?, ?)
+"""
+
+
+def _table_exists(conn: sqlite3.Connection, name: str) -> bool:
+    """Check whether a table exists on the given connection."""
+    cursor = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (name,)
+    )
+    return cursor.fetchone() is not None
+
+
 class Database:
     """SQLite database for storing archived sessions."""
 
@@ -147,14 +210,19 @@ class Database:
             self.conn = sqlite3.connect(self.db_path)
             self.conn.row_factory = sqlite3.Row
             self.conn.execute("PRAGMA foreign_keys = ON")
+            self.conn.executescript(CONNECTION_PRAGMAS)
+            # A brand-new archive gets the current schema straight from
+            # SCHEMA_TABLES, so only existing archives need migrating
+            is_new = not _table_exists(self.conn, "sessions")
             # 1. Create tables first
             self.conn.executescript(SCHEMA_TABLES)
             # 2. Run migrations to add new columns to existing tables
-            for migration in MIGRATIONS:
-                try:
-                    self.conn.execute(migration)
-                except sqlite3.OperationalError:
-                    pass  # Column/table already exists
+            if not is_new:
+                for migration in MIGRATIONS:
+                    try:
+                        self.conn.execute(migration)
+                    except sqlite3.OperationalError:
+                        pass  # Column/table already exists
             # 3. Create indexes after migrations (so new columns exist)
             self.conn.executescript(SCHEMA_INDEXES)
             self.conn.commit()
@@ -182,16 +250,26 @@ class Database:
     def insert_session(self, session: Session):
         """Insert a session and all its related data."""
         conn = self.connect()
+        self._write_session(conn, session)
+        conn.commit()
+
+    def insert_sessions(self, sessions: Iterable[Session]):
+        """Insert many sessions in a single transaction.
+
+        Equivalent to calling insert_session for each session, but commits
+        (and syncs to disk) once instead of once per session. If any insert
+        fails, the whole batch is rolled back.
+        """
+        conn = self.connect()
+        with conn:
+            for session in sessions:
+                self._write_session(conn, session)
 
+    def _write_session(self, conn: sqlite3.Connection, session: Session):
+        """Write a session's rows without committing."""
         # Insert session
         conn.execute(
-            """
-            INSERT OR REPLACE INTO sessions
-            (id, project, agent_type, cwd, git_branch, slug, summary, title, parent_session_id, started_at, ended_at,
-             claude_version, total_input_tokens, total_output_tokens, total_cache_read_tokens, model,
-             is_warmup, is_sidechain, github_repo, repo, repo_platform, session_context)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """,
+            SESSION_INSERT_SQL,
             (
                 session.id,
                 session.project,
@@ -218,15 +296,10 @@ class Database:
             ),
         )
 
-        # Insert messages
-        for message in session.messages:
-            conn.execute(
-                """
-                INSERT OR IGNORE INTO messages
-                (id, session_id, parent_uuid, type, timestamp, content, thinking, model,
-                 stop_reason, input_tokens, output_tokens, is_sidechain, is_compact_summary, has_images)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                """,
+        # Insert child rows, one executemany per table
+        conn.executemany(
+            MESSAGE_INSERT_SQL,
+            [
                 (
                     message.id,
                     message.session_id,
@@ -242,17 +315,13 @@ class Database:
                     message.is_sidechain,
                     message.is_compact_summary,
                     message.has_images,
-                ),
-            )
-
-        # Insert tool calls
-        for tool_call in session.tool_calls:
-            conn.execute(
-                """
-                INSERT OR IGNORE INTO tool_calls
-                (id, message_id, session_id, tool_name, input_json, timestamp)
-                VALUES (?, ?, ?, ?, ?, ?)
-                """,
+                )
+                for message in session.messages
+            ],
+        )
+        conn.executemany(
+            TOOL_CALL_INSERT_SQL,
+            [
                 (
                     tool_call.id,
                     tool_call.message_id,
@@ -260,17 +329,13 @@ class Database:
                     tool_call.tool_name,
                     tool_call.input_json,
                     tool_call.timestamp,
-                ),
-            )
-
-        # Insert tool results
-        for tool_result in session.tool_results:
-            conn.execute(
-                """
-                INSERT OR IGNORE INTO tool_results
-                (id, tool_call_id, session_id, content, is_error, timestamp)
-                VALUES (?, ?, ?, ?, ?, ?)
-                """,
+                )
+                for tool_call in session.tool_calls
+            ],
+        )
+        conn.executemany(
+            TOOL_RESULT_INSERT_SQL,
+            [
                 (
                     tool_result.id,
                     tool_result.tool_call_id,
@@ -278,33 +343,32 @@ class Database:
                     tool_result.content,
                     tool_result.is_error,
                     tool_result.timestamp,
-                ),
-            )
+                )
+                for tool_result in session.tool_results
+            ],
+        )
 
-        # Insert commits
-        for commit in session.commits:
-            conn.execute(
-                """
-                INSERT OR IGNORE INTO commits
-                (id, session_id, commit_hash, message, timestamp)
-                VALUES (?, ?, ?, ?, ?)
-                """,
-                (
-                    commit.id,
-                    commit.session_id,
-                    commit.commit_hash,
-                    commit.message,
-                    commit.timestamp,
-                ),
+        # Most sessions record no commits, so skip the statement entirely then
+        if session.commits:
+            conn.executemany(
+                COMMIT_INSERT_SQL,
+                [
+                    (
+                        commit.id,
+                        commit.session_id,
+                        commit.commit_hash,
+                        commit.message,
+                        commit.timestamp,
+                    )
+                    for commit in session.commits
+                ],
             )
 
-        conn.commit()
-
     def get_session_ids(self) -> list[str]:
         """Get all session IDs in the database."""
         conn = self.connect()
         cursor = conn.execute("SELECT id FROM sessions")
-        return [row["id"] for row in cursor.fetchall()]
+        return [row["id"] for row in cursor]
 
     def get_sessions_by_project(self, project: str) -> list[dict]:
         """Get all sessions for a project."""
@@ -313,7 +377,7 @@ class Database:
             "SELECT * FROM sessions WHERE project = ? ORDER BY started_at DESC",
             (project,),
         )
-        return [dict(row) for row in cursor.fetchall()]
+        return [dict(row) for row in cursor]
 
     def get_sessions_by_date_range(self, start_date: str, end_date: str) -> list[dict]:
         """Get sessions within a date range."""
@@ -326,13 +390,13 @@ class Database:
             """,
             (start_date, end_date),
         )
-        return [dict(row) for row in cursor.fetchall()]
+        return [dict(row) for row in cursor]
 
     def get_all_sessions(self) -> list[dict]:
         """Get all sessions."""
         conn = self.connect()
         cursor = conn.execute("SELECT * FROM sessions ORDER BY started_at DESC")
-        return [dict(row) for row in cursor.fetchall()]
+        return [dict(row) for row in cursor]
 
     def get_messages_for_session(self, session_id: str) -> list[dict]:
         """Get all messages for a session ordered by timestamp."""
@@ -341,7 +405,37 @@ class Database:
             "SELECT * FROM messages WHERE session_id = ? ORDER BY timestamp",
             (session_id,),
         )
-        return [dict(row) for row in cursor.fetchall()]
+        return [dict(row) for row in cursor]
+
+    def get_first_user_messages(self, session_ids: list[str]) -> dict[str, str]:
+        """Get the first non-empty user message content for each session.
+
+        Returns a mapping of session ID to content; sessions without a user
+        message are omitted. Uses one query per batch of IDs rather than
+        loading every message of every session.
+        """
+        conn = self.connect()
+        first_messages: dict[str, str] = {}
+        # Stay well under SQLite's bound-parameter limit
+        for start in range(0, len(session_ids), 500):
+            batch = session_ids[start : start + 500]
+            placeholders = ",".join("?" * len(batch))
+            cursor = conn.execute(
+                f"""
+                SELECT session_id, content FROM (
+                    SELECT session_id, content, ROW_NUMBER() OVER (
+                        PARTITION BY session_id ORDER BY timestamp, rowid
+                    ) AS rn
+                    FROM messages
+                    WHERE session_id IN ({placeholders})
+                      AND type = 'user' AND content IS NOT NULL AND content != ''
+                )
+                WHERE rn = 1
+                """,
+                batch,
+            )
+            first_messages.update((row["session_id"], row["content"]) for row in cursor)
+        return first_messages
 
     def get_tool_calls_for_session(self, session_id: str) -> list[dict]:
         """Get all tool calls for a session."""
@@ -350,7 +444,7 @@ class Database:
             "SELECT * FROM tool_calls WHERE session_id = ? ORDER BY timestamp",
             (session_id,),
         )
-        return [dict(row) for row in cursor.fetchall()]
+        return [dict(row) for row in cursor]
 
     def get_tool_results_for_session(self, session_id: str) -> list[dict]:
         """Get all tool results for a session."""
@@ -359,7 +453,7 @@ class Database:
             "SELECT * FROM tool_results WHERE session_id = ? ORDER BY timestamp",
             (session_id,),
         )
-        return [dict(row) for row in cursor.fetchall()]
+        return [dict(row) for row in cursor]
 
     def get_commits_for_session(self, session_id: str) -> list[dict]:
         """Get all commits for a session."""
@@ -368,7 +462,7 @@ class Database:
             "SELECT * FROM commits WHERE session_id = ? ORDER BY timestamp",
             (session_id,),
         )
-        return [dict(row) for row in cursor.fetchall()]
+        return [dict(row) for row in cursor]
 
     def get_sessions_by_repo(self, repo: str) -> list[dict]:
         """Get all sessions associated with a repo (owner/name)."""
@@ -377,7 +471,7 @@ class Database:
             "SELECT * FROM sessions WHERE repo = ? ORDER BY started_at DESC",
             (repo,),
         )
-        return [dict(row) for row in cursor.fetchall()]
+        return [dict(row) for row in cursor]
 
     def get_sessions_by_github_repo(self, github_repo: str) -> list[dict]:
         """Deprecated: use ``get_sessions_by_repo`` instead."""
@@ -410,12 +504,12 @@ class Database:
         stats["total_output_tokens"] = row["total"] or 0
 
         cursor = conn.execute("SELECT DISTINCT project FROM sessions")
-        stats["projects"] = [row["project"] for row in cursor.fetchall()]
+        stats["projects"] = [row["project"] for row in cursor]
 
         cursor = conn.execute(
             "SELECT DISTINCT repo FROM sessions WHERE repo IS NOT NULL"
         )
-        stats["repos"] = [row["repo"] for row in cursor.fetchall()]
+        stats["repos"] = [row["repo"] for row in cursor]
         # Deprecated alias
         stats["github_repos"] = stats["repos"]
 
@@ -428,27 +522,42 @@ class Database:
             "SELECT * FROM sessions WHERE parent_session_id = ? ORDER BY started_at",
             (parent_session_id,),
         )
-        return [dict(row) for row in cursor.fetchall()]
+        return [dict(row) for row in cursor]
 
     def get_session_tree(self, session_id: str) -> dict:
         """Get a session and all its descendants as a tree structure.
 
+        The whole subtree is fetched with one recursive query and assembled
+        in Python, rather than two queries per node.
+
         Returns:
             dict with keys: 'session' (the session data) and 'children' (list of child trees)
         """
         conn = self.connect()
-        cursor = conn.execute("SELECT * FROM sessions WHERE id = ?", (session_id,))
-        session_row = cursor.fetchone()
-        if not session_row:
+        cursor = conn.execute(
+            """
+            WITH RECURSIVE subtree(id) AS (
+                SELECT id FROM sessions WHERE id = ?
+                UNION
+                SELECT s.id FROM sessions s JOIN subtree t ON s.parent_session_id = t.id
+            )
+            SELECT * FROM sessions WHERE id IN (SELECT id FROM subtree)
+            ORDER BY started_at
+            """,
+            (session_id,),
+        )
+        rows = cursor.fetchall()
+        nodes: dict[str, dict[str, Any]] = {
+            row["id"]: {"session": dict(row), "children": []} for row in rows
+        }
+        if session_id not in nodes:
             return {}
 
-        session = dict(session_row)
-        children = self.get_child_sessions(session_id)
+        for row in rows:
+            if row["id"] != session_id:
+                nodes[row["parent_session_id"]]["children"].append(nodes[row["id"]])
 
-        return {
-            "session": session,
-            "children": [self.get_session_tree(child["id"]) for child in children],
-        }
+        return nodes[session_id]
 
     def get_root_sessions(self) -> list[dict]:
         """Get all sessions that have no parent (root sessions)."""
@@ -456,7 +565,7 @@ class Database:
         cursor = conn.execute(
             "SELECT * FROM sessions WHERE parent_session_id IS NULL ORDER BY started_at DESC"
         )
-        return [dict(row) for row in cursor.fetchall()]
+        return [dict(row) for row in cursor]
 
     def get_project_metrics(self, project: str) -> dict:
         """Get aggregate metrics for a project.
@@ -470,45 +579,34 @@ class Database:
         """
         conn = self.connect()
 
-        # Session count and token totals
-        cursor = conn.execute(
+        # One round-trip: session totals plus per-table counts over the
+        # project's sessions. Turns are user messages (each pairs with a reply).
+        row = conn.execute(
             """
+            WITH project_sessions AS (
+                SELECT id, total_input_tokens, total_output_tokens
+                FROM sessions WHERE project = ?
+            )
             SELECT
-                COUNT(*) as session_count,
-                COALESCE(SUM(total_input_tokens), 0) as total_input_tokens,
-                COALESCE(SUM(total_output_tokens), 0) as total_output_tokens
-            FROM sessions WHERE project = ?
+                (SELECT COUNT(*) FROM project_sessions) as session_count,
+                (SELECT COALESCE(SUM(total_input_tokens), 0)
+                 FROM project_sessions) as total_input_tokens,
+                (SELECT COALESCE(SUM(total_output_tokens), 0)
+                 FROM project_sessions) as total_output_tokens,
+                (SELECT COUNT(*)
+                 FROM messages m JOIN project_sessions ps ON m.session_id = ps.id
+                 WHERE m.type = 'user') as turn_count,
+                (SELECT COUNT(*)
+                 FROM tool_calls tc JOIN project_sessions ps ON tc.session_id = ps.id
+                ) as tool_call_count
             """,
             (project,),
-        )
-        row = cursor.fetchone()
+        ).fetchone()
         session_count = row["session_count"]
         total_input_tokens = row["total_input_tokens"]
         total_output_tokens = row["total_output_tokens"]
-
-        # Turn count: count user messages (each user message pairs with an assistant response)
-        cursor = conn.execute(
-            """
-            SELECT COUNT(*) as turn_count
-            FROM messages m
-            JOIN sessions s ON m.session_id = s.id
-            WHERE s.project = ? AND m.type = 'user'
-            """,
-            (project,),
-        )
-        turn_count = cursor.fetchone()["turn_count"]
-
-        # Tool call count
-        cursor = conn.execute(
-            """
-            SELECT COUNT(*) as tool_call_count
-            FROM tool_calls tc
-            JOIN sessions s ON tc.session_id = s.id
-            WHERE s.project = ?
-            """,
-            (project,),
-        )
-        tool_call_count = cursor.fetchone()["tool_call_count"]
+        turn_count = row["turn_count"]
+        tool_call_count = row["tool_call_count"]
 
         return {
             "session_count": session_count,
@@ -564,29 +662,31 @@ class Database:
                 GROUP BY s.id
                 HAVING msg_count > 0
             ),
+            -- Rank cutoffs computed once rather than per ranked row; a
+            -- percentile that falls below the first rank uses rank 1
+            cutoffs AS (
+                SELECT
+                    MAX(CAST(COUNT(*) * 0.50 AS INT), 1) as r50,
+                    MAX(CAST(COUNT(*) * 0.75 AS INT), 1) as r75,
+                    MAX(CAST(COUNT(*) * 0.90 AS INT), 1) as r90
+                FROM session_stats
+            ),
             ranked AS (
                 SELECT
                     msg_count,
                     output_tokens,
                     ROW_NUMBER() OVER (ORDER BY msg_count) as msg_rank,
-                    ROW_NUMBER() OVER (ORDER BY output_tokens) as token_rank,
-                    COUNT(*) OVER () as total
+                    ROW_NUMBER() OVER (ORDER BY output_tokens) as token_rank
                 FROM session_stats
             )
             SELECT
-                MAX(CASE WHEN msg_rank = CAST(total * 0.50 AS INT) OR
-                         (total * 0.50 < 1 AND msg_rank = 1) THEN msg_count END) as p50_msgs,
-                MAX(CASE WHEN msg_rank = CAST(total * 0.75 AS INT) OR
-                         (total * 0.75 < 1 AND msg_rank = 1) THEN msg_count END) as p75_msgs,
-                MAX(CASE WHEN msg_rank = CAST(total * 0.90 AS INT) OR
-                         (total * 0.90 < 1 AND msg_rank = 1) THEN msg_count END) as p90_msgs,
-                MAX(CASE WHEN token_rank = CAST(total * 0.50 AS INT) OR
-                         (total * 0.50 < 1 AND token_rank = 1) THEN output_tokens END) as p50_tokens,
-                MAX(CASE WHEN token_rank = CAST(total * 0.75 AS INT) OR
-                         (total * 0.75 < 1 AND token_rank = 1) THEN output_tokens END) as p75_tokens,
-                MAX(CASE WHEN token_rank = CAST(total * 0.90 AS INT) OR
-                         (total * 0.90 < 1 AND token_rank = 1) THEN output_tokens END) as p90_tokens
-            FROM ranked
+                MAX(CASE WHEN msg_rank = r50 THEN msg_count END) as p50_msgs,
+                MAX(CASE WHEN msg_rank = r75 THEN msg_count END) as p75_msgs,
+                MAX(CASE WHEN msg_rank = r90 THEN msg_count END) as p90_msgs,
+                MAX(CASE WHEN token_rank = r50 THEN output_tokens END) as p50_tokens,
+                MAX(CASE WHEN token_rank = r75 THEN output_tokens END) as p75_tokens,
+                MAX(CASE WHEN token_rank = r90 THEN output_tokens END) as p90_tokens
+            FROM ranked, cutoffs
             """
         )
         row = cursor.fetchone()
@@ -622,6 +722,18 @@ class Database:
             )
         return dict(rows[0])
 
+    def get_sessions_by_id_prefix(self, prefix: str) -> list[dict]:
+        """Get all sessions whose ID starts with *prefix* (case-sensitive)."""
+        # GLOB is case-sensitive like str.startswith and, unlike LIKE, can
+        # use the primary key index; bracket the GLOB metacharacters.
+        pattern = "".join(f"[{c}]" if c in "*?[" else c for c in prefix) + "*"
+        conn = self.connect()
+        cursor = conn.execute(
+            "SELECT * FROM sessions WHERE id GLOB ? ORDER BY started_at DESC",
+            (pattern,),
+        )
+        return [dict(row) for row in cursor]
+
     def get_project_session_stats(self, project: str) -> dict:
         """Get session statistics for a specific project.
 
@@ -1,14 +1,17 @@
 """Debrief context gathering and session guide generation."""
 
+import heapq
 import json
 import re
 import shutil
 import subprocess
 from collections import Counter
 from datetime import datetime, timedelta
+from itertools import islice
 from pathlib import Path
 from typing import Optional
 
+from .analyzer.session_analyzer import load_prompt
 from .config import Config
 from .database import Database
 from .models import Message, Session, ToolCall, ToolResult
@@ -31,22 +34,26 @@ def discover_related_sessions(
     if not sessions:
         return []
 
-    # Sort by date proximity to primary session
+    # Rank by date proximity to primary session
     primary_started = primary_session.get("started_at") or ""
+    try:
+        p_dt = datetime.fromisoformat(primary_started.replace("Z", "+00:00"))
+    except ValueError:
+        # No usable primary date: every distance is infinite, keep query order
+        return sessions[:max_results]
 
     def date_distance(s: dict) -> float:
         s_date = s.get("started_at") or ""
-        if not s_date or not primary_started:
+        if not s_date:
             return float("inf")
         try:
-            p_dt = datetime.fromisoformat(primary_started.replace("Z", "+00:00"))
             s_dt = datetime.fromisoformat(s_date.replace("Z", "+00:00"))
             return abs((p_dt - s_dt).total_seconds())
         except (ValueError, TypeError):
             return float("inf")
 
-    sessions.sort(key=date_distance)
-    return sessions[:max_results]
+    # Equivalent to sorted(...)[:max_results] without sorting every session
+    return heapq.nsmallest(max_results, sessions, key=date_distance)
 
 
 def gather_git_context(
@@ -221,14 +228,22 @@ def _format_pr_markdown(pr: dict, repo: str) -> str:
 # ---------------------------------------------------------------------------
 
 
+def _count_user_messages(messages: list[dict]) -> int:
+    """Count messages of type ``user``."""
+    return sum(1 for m in messages if m.get("type") == "user")
+
+
 def _extract_opening_context(messages: list[dict]) -> str:
     """Extract the first 1-3 user messages as opening context."""
-    user_msgs = [m for m in messages if m.get("type") == "user"]
+    # Only the first three are needed, so stop scanning once they are found
+    user_msgs = list(
+        islice((m for m in messages if m.get("type") == "user"), 3)
+    )
     if not user_msgs:
         return "No user messages found."
 
     parts = []
-    for msg in user_msgs[:3]:
+    for msg in user_msgs:
         content = (msg.get("content") or "").strip()
         if len(content) > 500:
             content = content[:500] + "..."
@@ -238,6 +253,27 @@ def _extract_opening_context(messages: list[dict]) -> str:
     return "\n\n---\n\n".join(parts) if parts else "No user messages found."
 
 
+# Commit message keywords per category, checked in order (first match wins)
+_COMMIT_CATEGORY_KEYWORDS: list[tuple[str, set[str]]] = [
+    ("ci", {"ci", "pipeline", "workflow", "actions", "lint", "ruff", "mypy",
+            "pre-commit", "formatting", "format", "linter", "flake"}),
+    ("fix", {"fix", "bug", "patch", "resolve", "hotfix", "repair", "correct",
+            "prevent", "cap", "oom", "crash", "harden", "limit", "overflow",
+            "underflow", "panic", "abort"}),
+    ("test", {"test", "spec", "coverage", "assert"}),
+    ("docs", {"doc", "readme", "documentation", "comment", "changelog"}),
+    ("refactor", {"refactor", "rename", "restructure", "reorganize", "clean",
+                  "simplify", "extract", "move"}),
+    ("feature", {"add", "feat", "feature", "implement", "new", "support",
+                 "introduce", "create"}),
+]
+
+_COMMIT_CATEGORY_RES: list[tuple[str, re.Pattern]] = [
+    (category, re.compile("|".join(map(re.escape, sorted(keywords)))))
+    for category, keywords in _COMMIT_CATEGORY_KEYWORDS
+]
+
+
 def _categorize_commits(commits: list[dict]) -> dict:
     """Categorize commits by keyword matching on their messages."""
     categories: dict[str, list[dict]] = {
@@ -250,26 +286,12 @@ def _categorize_commits(commits: list[dict]) -> dict:
         "other": [],
     }
 
-    keyword_map: list[tuple[str, set[str]]] = [
-        ("ci", {"ci", "pipeline", "workflow", "actions", "lint", "ruff", "mypy",
-                "pre-commit", "formatting", "format", "linter", "flake"}),
-        ("fix", {"fix", "bug", "patch", "resolve", "hotfix", "repair", "correct",
-                "prevent", "cap", "oom", "crash", "harden", "limit", "overflow",
-                "underflow", "panic", "abort"}),
-        ("test", {"test", "spec", "coverage", "assert"}),
-        ("docs", {"doc", "readme", "documentation", "comment", "changelog"}),
-        ("refactor", {"refactor", "rename", "restructure", "reorganize", "clean",
-                      "simplify", "extract", "move"}),
-        ("feature", {"add", "feat", "feature", "implement", "new", "support",
-                     "introduce", "create"}),
-    ]
-
     for commit in commits:
         msg = (commit.get("message") or "").lower()
         matched = False
 
-        for category, keywords in keyword_map:
-            if any(kw in msg for kw in keywords):
+        for category, pattern in _COMMIT_CATEGORY_RES:
+            if pattern.search(msg):
                 categories[category].append(commit)
                 matched = True
                 break
@@ -300,18 +322,27 @@ def _describe_session_characteristics(
     messages: list[dict],
     tool_calls: list[dict],
     commits: list[dict],
+    user_count: Optional[int] = None,
+    tool_counts: Optional[dict] = None,
+    commit_cats: Optional[dict] = None,
 ) -> str:
     """Describe observable session characteristics.
 
     Returns plain-English observations about tool usage, commit patterns,
     and message flow.  Does NOT classify the session into a fixed category —
-    the arc only becomes clear after the interview.
+    the arc only becomes clear after the interview.  *user_count*,
+    *tool_counts* and *commit_cats* may be passed when the caller has already
+    computed them (see ``_analyze_tool_patterns`` and ``_categorize_commits``).
     """
     observations: list[str] = []
 
     # Tool usage patterns
     if tool_calls:
-        tool_counter: Counter = Counter(tc["tool_name"] for tc in tool_calls)
+        tool_counter: Counter = (
+            Counter(tool_counts)
+            if tool_counts is not None
+            else Counter(tc["tool_name"] for tc in tool_calls)
+        )
         total_tc = len(tool_calls)
         top_tools = tool_counter.most_common(3)
 
@@ -337,7 +368,8 @@ def _describe_session_characteristics(
 
     # Commit patterns
     if commits:
-        commit_cats = _categorize_commits(commits)
+        if commit_cats is None:
+            commit_cats = _categorize_commits(commits)
         cat_counts = commit_cats["category_counts"]
         if cat_counts:
             top_cat = max(cat_counts, key=lambda k: cat_counts[k])
@@ -349,7 +381,8 @@ def _describe_session_characteristics(
 
     # Message volume
     total = len(messages)
-    user_count = sum(1 for m in messages if m.get("type") == "user")
+    if user_count is None:
+        user_count = _count_user_messages(messages)
     if total > 100:
         observations.append(f"Long session: {total} messages, {user_count} from user")
     elif total < 20:
@@ -358,25 +391,32 @@ def _describe_session_characteristics(
     return ". ".join(observations) + "." if observations else "No notable patterns observed."
 
 
-def _compute_autonomy_ratio(messages: list[dict]) -> tuple[float, str]:
+# Autonomy labels by user-message ratio: <10%, <25%, <50%, and the rest
+_AUTONOMY_TIERS = (
+    "High AI autonomy",
+    "Moderate autonomy",
+    "Collaborative",
+    "User-driven",
+)
+
+
+def _compute_autonomy_ratio(
+    messages: list[dict], user_count: Optional[int] = None
+) -> tuple[float, str]:
     """Compute and describe the ratio of user messages to total messages."""
     total = len(messages)
     if total == 0:
         return 0.0, "No messages in session"
 
-    user_msgs = sum(1 for m in messages if m.get("type") == "user")
+    user_msgs = (
+        user_count if user_count is not None else _count_user_messages(messages)
+    )
     ratio = user_msgs / total
 
-    if ratio < 0.10:
-        desc = f"High AI autonomy — {user_msgs} user messages in {total} total"
-    elif ratio < 0.25:
-        desc = f"Moderate autonomy — {user_msgs} user messages in {total} total"
-    elif ratio < 0.50:
-        desc = f"Collaborative — {user_msgs} user messages in {total} total"
-    else:
-        desc = f"User-driven — {user_msgs} user messages in {total} total"
-
-    return ratio, desc
+    # Each threshold reached moves one tier along; the bools sum to an index
+    tier = (ratio >= 0.10) + (ratio >= 0.25) + (ratio >= 0.50)
+    label = _AUTONOMY_TIERS[tier]
+    return ratio, f"{label} — {user_msgs} user messages in {total} total"
 
 
 def _analyze_tool_patterns(tool_calls: list[dict]) -> dict:
@@ -388,8 +428,9 @@ def _analyze_tool_patterns(tool_calls: list[dict]) -> dict:
             "top_trigrams": [],
         }
 
-    counter: Counter = Counter(tc["tool_name"] for tc in tool_calls)
-    total = len(tool_calls)
+    tool_names = [tc["tool_name"] for tc in tool_calls]
+    counter: Counter = Counter(tool_names)
+    total = len(tool_names)
 
     top = counter.most_common(1)[0]
     dominant_description = (
@@ -398,10 +439,9 @@ def _analyze_tool_patterns(tool_calls: list[dict]) -> dict:
     )
 
     # 3-grams of tool sequences
-    tool_names = [tc["tool_name"] for tc in tool_calls]
-    trigram_counter: Counter = Counter()
-    for i in range(len(tool_names) - 2):
-        trigram_counter[(tool_names[i], tool_names[i + 1], tool_names[i + 2])] += 1
+    trigram_counter: Counter = Counter(
+        zip(tool_names, tool_names[1:], tool_names[2:])
+    )
 
     top_trigrams = trigram_counter.most_common(5)
 
@@ -427,6 +467,16 @@ def _analyze_thinking_blocks(messages: list[dict]) -> dict:
     }
 
 
+# Correction language in short user replies, matched as one alternation
+_CORRECTION_PATTERNS = [
+    "no,", "no ", "wrong", "actually", "instead", "don't", "doesn't",
+    "didn't", "stop", "wait", "not what", "that's not", "rather",
+    "try ", "nope", "shouldn't", "won't work", "doesn't work",
+    "didn't work", "not right", "can't",
+]
+_CORRECTION_RE = re.compile("|".join(map(re.escape, _CORRECTION_PATTERNS)))
+
+
 def _detect_key_moments(messages: list[dict]) -> list[dict]:
     """Detect moments where the user corrected or redirected the AI.
 
@@ -434,13 +484,6 @@ def _detect_key_moments(messages: list[dict]) -> list[dict]:
     - Short user messages after assistant messages containing correction language
     - User-initiated interruptions (``[Request interrupted by user]``)
     """
-    correction_patterns = [
-        "no,", "no ", "wrong", "actually", "instead", "don't", "doesn't",
-        "didn't", "stop", "wait", "not what", "that's not", "rather",
-        "try ", "nope", "shouldn't", "won't work", "doesn't work",
-        "didn't work", "not right", "can't",
-    ]
-
     moments: list[dict] = []
     for i, msg in enumerate(messages):
         if msg.get("type") != "user":
@@ -450,8 +493,10 @@ def _detect_key_moments(messages: list[dict]) -> list[dict]:
         if not content:
             continue
 
+        content_lower = content.lower()
+
         # Detect user interruptions
-        if "[request interrupted by user" in content.lower():
+        if "[request interrupted by user" in content_lower:
             moments.append({
                 "index": i,
                 "content": "[User interrupted the AI]",
@@ -472,8 +517,7 @@ def _detect_key_moments(messages: list[dict]) -> list[dict]:
         if prev.get("type") != "assistant":
             continue
 
-        content_lower = content.lower()
-        if any(pattern in content_lower for pattern in correction_patterns):
+        if _CORRECTION_RE.search(content_lower):
             moments.append({
                 "index": i,
                 "content": content[:200],
@@ -486,6 +530,16 @@ def _detect_key_moments(messages: list[dict]) -> list[dict]:
     return moments
 
 
+def _parse_iso_timestamp(timestamp: str) -> Optional[datetime]:
+    """Parse an ISO 8601 timestamp (``Z`` or offset form); None if invalid."""
+    if not timestamp:
+        return None
+    try:
+        return datetime.fromisoformat(timestamp.replace("Z", "+00:00"))
+    except ValueError:
+        return None
+
+
 def _build_timeline_summary(messages: list[dict], commits: list[dict]) -> str:
     """Describe the temporal structure of the session.
 
@@ -502,26 +556,19 @@ def _build_timeline_summary(messages: list[dict], commits: list[dict]) -> str:
     # Detect temporal gaps to find distinct work sessions
     gap_threshold = 3600  # 1 hour in seconds
     work_sessions: list[list[dict]] = [[]]
+    prev_dt: Optional[datetime] = None
     for i, msg in enumerate(messages):
-        if i == 0:
-            work_sessions[0].append(msg)
-            continue
-        ts_curr = msg.get("timestamp") or ""
-        ts_prev = messages[i - 1].get("timestamp") or ""
-        if ts_curr and ts_prev:
+        # Parse each timestamp once; it is compared against both neighbours
+        curr_dt = _parse_iso_timestamp(msg.get("timestamp") or "")
+        if i > 0 and curr_dt is not None and prev_dt is not None:
             try:
-                from datetime import datetime as _dt
-                # Parse ISO timestamps (handle Z and +00:00)
-                t_curr = ts_curr.replace("Z", "+00:00")
-                t_prev = ts_prev.replace("Z", "+00:00")
-                dt_curr = _dt.fromisoformat(t_curr)
-                dt_prev = _dt.fromisoformat(t_prev)
-                gap = (dt_curr - dt_prev).total_seconds()
+                gap = (curr_dt - prev_dt).total_seconds()
                 if gap > gap_threshold:
                     work_sessions.append([])
-            except (ValueError, TypeError):
-                pass
+            except TypeError:
+                pass  # naive vs aware timestamps
         work_sessions[-1].append(msg)
+        prev_dt = curr_dt
 
     # Describe work sessions if there are multiple
     parts: list[str] = []
@@ -583,13 +630,23 @@ def build_session_preanalysis(
     from the session data.  Returns a dict that can be rendered to markdown
     and passed to other debrief functions.
     """
+    # Count user messages once; several helpers need the figure
+    user_count = _count_user_messages(messages)
+
+    # Tool and commit tallies feed both the patterns and the characteristics
+    tools = _analyze_tool_patterns(tool_calls)
+    commit_cats = _categorize_commits(commits)
+
     opening = _extract_opening_context(messages)
     characteristics = _describe_session_characteristics(
-        messages, tool_calls, commits
+        messages,
+        tool_calls,
+        commits,
+        user_count=user_count,
+        tool_counts=tools["counts"],
+        commit_cats=commit_cats,
     )
-    ratio, ratio_desc = _compute_autonomy_ratio(messages)
-    tools = _analyze_tool_patterns(tool_calls)
-    commit_cats = _categorize_commits(commits)
+    ratio, ratio_desc = _compute_autonomy_ratio(messages, user_count=user_count)
     thinking = _analyze_thinking_blocks(messages)
     moments = _detect_key_moments(messages)
     timeline = _build_timeline_summary(messages, commits)
@@ -605,9 +662,7 @@ def build_session_preanalysis(
         "key_moments": moments,
         "timeline_summary": timeline,
         "total_messages": len(messages),
-        "user_messages": sum(
-            1 for m in messages if m.get("type") == "user"
-        ),
+        "user_messages": user_count,
         "total_commits": len(commits),
     }
 
@@ -827,9 +882,10 @@ def build_metrics_summary(
     if commits is None:
         commits = db.get_commits_for_session(session_id)
 
-    # Message counts by type
-    user_msgs = sum(1 for m in messages if m["type"] == "user")
-    assistant_msgs = sum(1 for m in messages if m["type"] == "assistant")
+    # Message counts by type, tallied in one pass
+    type_counter: Counter = Counter(m["type"] for m in messages)
+    user_msgs = type_counter["user"]
+    assistant_msgs = type_counter["assistant"]
     total_msgs = len(messages)
 
     # Token counts
@@ -838,9 +894,7 @@ def build_metrics_summary(
     cache_read_tokens = primary_session.get("total_cache_read_tokens") or 0
 
     # Tool usage breakdown
-    tool_counter: Counter = Counter()
-    for tc in tool_calls:
-        tool_counter[tc["tool_name"]] += 1
+    tool_counter: Counter = Counter(tc["tool_name"] for tc in tool_calls)
 
     # Timeline
     started = primary_session.get("started_at") or "unknown"
@@ -921,6 +975,9 @@ def build_metrics_summary(
     return md
 
 
+_SLUG_SEPARATOR_RE = re.compile(r"[^a-z0-9]+")
+
+
 def generate_slug(
     primary_session: dict,
     first_user_message: Optional[str] = None,
@@ -945,7 +1002,7 @@ def generate_slug(
 
     # Convert to slug: lowercase, replace non-alphanumeric with hyphens, collapse
     slug = text.lower().strip()
-    slug = re.sub(r"[^a-z0-9]+", "-", slug)
+    slug = _SLUG_SEPARATOR_RE.sub("-", slug)
     slug = slug.strip("-")
     # Truncate to reasonable length
     if len(slug) > 60:
@@ -953,6 +1010,11 @@ def generate_slug(
     return slug or primary_session["id"][:8]
 
 
+def load_session_guide_template() -> str:
+    """Load the session guide template from the prompts directory (cached)."""
+    return load_prompt("session_guide_template.md")
+
+
 def generate_session_guide(
     primary_session: dict,
     related_sessions: list[dict],
@@ -969,8 +1031,7 @@ def generate_session_guide(
     When *preanalysis* is provided, populates the What Happened section,
     session-specific interview questions, and context inventory entries.
     """
-    template_path = Path(__file__).parent / "prompts" / "session_guide_template.md"
-    template = template_path.read_text(encoding="utf-8")
+    template = load_session_guide_template()
 
     # Build context inventory entries
     related_entry = ""
@@ -1076,6 +1137,7 @@ def _reconstruct_session_from_db(db: Database, session_dict: dict) -> Session:
             )
         )
 
+    messages_by_id = {message.id: message for message in messages}
     tool_calls: list[ToolCall] = []
     for tc in db.get_tool_calls_for_session(session_id):
         tool_call = ToolCall(
@@ -1087,10 +1149,9 @@ def _reconstruct_session_from_db(db: Database, session_dict: dict) -> Session:
             timestamp=tc["timestamp"],
         )
         tool_calls.append(tool_call)
-        for message in messages:
-            if message.id == tc["message_id"]:
-                message.tool_calls.append(tool_call)
-                break
+        message = messages_by_id.get(tc["message_id"])
+        if message is not None:
+            message.tool_calls.append(tool_call)
 
     tool_results: list[ToolResult] = []
     for tr in db.get_tool_results_for_session(session_id):
@@ -1263,6 +1324,16 @@ def _build_related_sessions_md(
     md = "# Related Sessions\n\n"
     md += f"Found {len(related_sessions)} related sessions in the same project.\n\n"
 
+    # Fetch every related session's first prompt in one query
+    first_prompts: dict[str, str] = {}
+    if db is not None:
+        try:
+            first_prompts = db.get_first_user_messages(
+                [s["id"] for s in related_sessions]
+            )
+        except Exception:
+            pass
+
     for i, s in enumerate(related_sessions, 1):
         session_id = s["id"][:12]
         started = s.get("started_at") or "unknown"
@@ -1278,22 +1349,12 @@ def _build_related_sessions_md(
         md += f"- **Input tokens**: {input_tokens:,}\n"
         md += f"- **Output tokens**: {output_tokens:,}\n"
 
-        # Extract first user message when DB is available
-        if db is not None:
-            try:
-                msgs = db.get_messages_for_session(s["id"])
-                first_user = next(
-                    (m for m in msgs
-                     if m.get("type") == "user" and m.get("content")),
-                    None,
-                )
-                if first_user:
-                    content = (first_user["content"] or "").strip()
-                    if len(content) > 200:
-                        content = content[:200] + "..."
-                    md += f"- **First prompt**: {content}\n"
-            except Exception:
-                pass
+        first_prompt = first_prompts.get(s["id"])
+        if first_prompt:
+            content = first_prompt.strip()
+            if len(content) > 200:
+                content = content[:200] + "..."
+            md += f"- **First prompt**: {content}\n"
 
         md += "\n"
 
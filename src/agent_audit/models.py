@@ -2,6 +2,7 @@
 
 import re
 from dataclasses import dataclass, field
+from functools import lru_cache
 from typing import Optional
 
 # Regex to match git commit output: [branch hash] message
@@ -35,7 +36,21 @@ def detect_platform(hostname: str) -> str | None:
     return KNOWN_PLATFORMS.get(hostname.lower())
 
 
-@dataclass
+@lru_cache(maxsize=256)
+def parse_repo_url(url: str) -> tuple[str, str | None] | None:
+    """Split a git remote URL into (owner/repo path, platform).
+
+    Returns None when the URL is not recognized. Cached because every session
+    from the same checkout carries the same remote URL.
+    """
+    match = REPO_URL_PATTERN.search(url)
+    if not match:
+        return None
+    hostname, path = match.groups()
+    return path, detect_platform(hostname)
+
+
+@dataclass(slots=True)
 class Commit:
     """Represents a git commit extracted from tool results."""
 
@@ -46,7 +61,7 @@ class Commit:
     timestamp: Optional[str] = None
 
 
-@dataclass
+@dataclass(slots=True)
 class ToolCall:
     """Represents a tool call made by the assistant."""
 
@@ -58,7 +73,7 @@ class ToolCall:
     timestamp: Optional[str] = None
 
 
-@dataclass
+@dataclass(slots=True)
 class ToolResult:
     """Represents the result of a tool call."""
 
@@ -70,7 +85,7 @@ class ToolResult:
     timestamp: Optional[str] = None
 
 
-@dataclass
+@dataclass(slots=True)
 class Message:
     """Represents a message in a session."""
 
@@ -91,7 +106,7 @@ class Message:
     tool_calls: list[ToolCall] = field(default_factory=list)
 
 
-@dataclass
+@dataclass(slots=True)
 class Session:
     """Represents a coding agent session (Claude Code, Codex, etc.)."""
 
@@ -1,33 +1,65 @@
 """Parse Claude Code JSONL session files."""
 
 import json
+import os
+import re
+import sys
 import uuid
+from functools import lru_cache
 from pathlib import Path
-from typing import Iterator
+from typing import Any, Iterator
 
+from ._json import loads as _json_loads
 from .models import (
     Commit,
     COMMIT_PATTERN,
     REPO_PUSH_PATTERN,
-    REPO_URL_PATTERN,
-    detect_platform,
+    parse_repo_url,
     Message,
     Session,
     ToolCall,
     ToolResult,
 )
 
+# Prefixes of local slash-command transcript entries that are not real messages
+SYSTEM_COMMAND_PREFIXES = ("<command-name>", "<local-command-")
 
-def parse_jsonl_file(file_path: Path) -> Iterator[dict]:
-    """Yield each JSON object from a JSONL file."""
-    with open(file_path, "r", encoding="utf-8") as f:
+# Entry types that carry no message data
+SKIPPED_ENTRY_TYPES = ("file-history-snapshot", "queue-operation")
+
+
+def _intern(value: Any) -> Any:
+    """Intern strings that repeat across many records (tool names, types).
+
+    Values decoded from JSON may be of any type; non-strings pass through.
+    """
+    return sys.intern(value) if type(value) is str else value
+
+
+def parse_jsonl_file(
+    file_path: Path, skip_types: tuple[str, ...] = ()
+) -> Iterator[dict]:
+    """Yield each JSON object from a JSONL file.
+
+    Lines that open with a compact ``{"type":"<name>"`` for any name in
+    skip_types are dropped before decoding. Only the leading key is checked,
+    so a nested object or string that happens to contain the same pair never
+    drops a line. Callers should still filter decoded entries by type, since
+    other key orders and spellings are not caught.
+    """
+    prefixes = tuple(f'{{"type":"{t}"'.encode() for t in skip_types)
+    with open(file_path, "rb") as f:
         for line in f:
             line = line.strip()
-            if line:
-                try:
-                    yield json.loads(line)
-                except json.JSONDecodeError:
-                    continue
+            if not line:
+                continue
+            if prefixes and line.startswith(prefixes):
+                continue
+            try:
+                yield _json_loads(line)
+            except ValueError:
+                # JSONDecodeError, or UnicodeDecodeError for invalid UTF-8
+                continue
 
 
 def extract_text_content(content) -> str:
@@ -38,9 +70,10 @@ def extract_text_content(content) -> str:
         texts = []
         for block in content:
             if isinstance(block, dict):
-                if block.get("type") == "text":
+                block_type = block.get("type")
+                if block_type == "text":
                     texts.append(block.get("text", ""))
-                elif block.get("type") == "tool_result":
+                elif block_type == "tool_result":
                     result_content = block.get("content", "")
                     if isinstance(result_content, str):
                         texts.append(f"[Tool Result: {result_content[:200]}...]")
@@ -73,10 +106,10 @@ def extract_tool_calls(
             if isinstance(block, dict) and block.get("type") == "tool_use":
                 tool_calls.append(
                     ToolCall(
-                        id=block.get("id", str(uuid.uuid4())),
+                        id=block["id"] if "id" in block else str(uuid.uuid4()),
                         message_id=message_id,
                         session_id=session_id,
-                        tool_name=block.get("name", "unknown"),
+                        tool_name=_intern(block.get("name", "unknown")),
                         input_json=json.dumps(block.get("input", {})),
                         timestamp=timestamp,
                     )
@@ -90,14 +123,15 @@ def extract_tool_results(content, session_id: str, timestamp: str) -> list[ToolR
     if isinstance(content, list):
         for block in content:
             if isinstance(block, dict) and block.get("type") == "tool_result":
+                result_content = block.get("content", "")
+                if type(result_content) is not str:
+                    result_content = str(result_content)
                 tool_results.append(
                     ToolResult(
                         id=str(uuid.uuid4()),
                         tool_call_id=block.get("tool_use_id", ""),
                         session_id=session_id,
-                        content=str(block.get("content", ""))[
-                            :10000
-                        ],  # Truncate large results
+                        content=result_content[:10000],  # Truncate large results
                         is_error=block.get("is_error", False),
                         timestamp=timestamp,
                     )
@@ -179,17 +213,25 @@ def extract_repo_from_session_context(
     sources = session_context.get("sources", [])
     for source in sources:
         if source.get("type") == "git_repository":
-            url = source.get("url", "")
-            match = REPO_URL_PATTERN.search(url)
-            if match:
-                hostname = match.group(1)
-                path = match.group(2)
-                platform = detect_platform(hostname)
-                return path, platform
+            parsed = parse_repo_url(source.get("url", ""))
+            if parsed:
+                return parsed
 
     return None, None
 
 
+def is_system_command(text: str) -> bool:
+    """Check if message text is a local slash-command transcript entry.
+
+    Only strips the text when it could possibly match, so ordinary messages
+    are not copied just to inspect their first character.
+    """
+    head = text[:1]
+    if head != "<" and not head.isspace():
+        return False
+    return text.lstrip().startswith(SYSTEM_COMMAND_PREFIXES)
+
+
 def has_image_content(content) -> bool:
     """Check if message content contains any image blocks."""
     if isinstance(content, list):
@@ -261,26 +303,27 @@ def parse_session(file_path: Path, project_name: str) -> Session:
     total_output = 0
     total_cache = 0
 
-    for entry in parse_jsonl_file(file_path):
-        entry_type = entry.get("type")
+    for entry in parse_jsonl_file(file_path, skip_types=SKIPPED_ENTRY_TYPES):
+        get = entry.get
+        entry_type = get("type")
 
         # Skip non-message types
-        if entry_type in ("file-history-snapshot", "queue-operation"):
+        if entry_type in SKIPPED_ENTRY_TYPES:
             continue
 
         # Extract session metadata from first user message
-        if not session.cwd and entry.get("cwd"):
-            session.cwd = entry.get("cwd")
-        if not session.git_branch and entry.get("gitBranch"):
-            session.git_branch = entry.get("gitBranch")
-        if not session.claude_version and entry.get("version"):
-            session.claude_version = entry.get("version")
-        if not session.slug and entry.get("slug"):
-            session.slug = entry.get("slug")
+        if not session.cwd and (cwd := get("cwd")):
+            session.cwd = cwd
+        if not session.git_branch and (git_branch := get("gitBranch")):
+            session.git_branch = git_branch
+        if not session.claude_version and (version := get("version")):
+            session.claude_version = version
+        if not session.slug and (slug := get("slug")):
+            session.slug = slug
         # For agent sessions, sessionId points to the parent session
         # (agentId is the agent's own ID, same as filename suffix)
         # Only set parent if sessionId differs from own ID (regular sessions have sessionId == own ID)
-        entry_session_id = entry.get("sessionId")
+        entry_session_id = get("sessionId")
         if (
             not session.parent_session_id
             and entry_session_id
@@ -289,13 +332,12 @@ def parse_session(file_path: Path, project_name: str) -> Session:
             session.parent_session_id = entry_session_id
 
         # Extract summary from summary-type entries
-        if entry_type == "summary" and entry.get("summary"):
-            session.summary = entry.get("summary")
+        if entry_type == "summary" and (summary := get("summary")):
+            session.summary = summary
             continue  # Summary entries don't have message data
 
         # Extract session_context if present (typically on first entry)
-        if not session.session_context and entry.get("session_context"):
-            session_context = entry.get("session_context")
+        if not session.session_context and (session_context := get("session_context")):
             session.session_context = json.dumps(session_context)
             # Try to extract repo from session_context
             if isinstance(session_context, dict):
@@ -306,20 +348,20 @@ def parse_session(file_path: Path, project_name: str) -> Session:
                         session.repo_platform = platform
 
         # Extract title if present
-        if not session.title and entry.get("title"):
-            session.title = entry.get("title")
+        if not session.title and (title := get("title")):
+            session.title = title
 
         # Track isCompactSummary for this entry
-        is_compact_summary = entry.get("isCompactSummary", False)
+        is_compact_summary = get("isCompactSummary", False)
 
-        timestamp = entry.get("timestamp", "")
-        message_data = entry.get("message", {})
+        timestamp = get("timestamp", "")
+        message_data = get("message", {})
 
         if not message_data:
             continue
 
         # Skip meta messages (system commands, caveats, etc.)
-        if entry.get("isMeta"):
+        if get("isMeta"):
             continue
 
         # Skip system command messages
@@ -327,9 +369,7 @@ def parse_session(file_path: Path, project_name: str) -> Session:
         text_content = (
             extract_text_content(content) if isinstance(content, list) else content
         )
-        if isinstance(text_content, str) and text_content.strip().startswith(
-            ("<command-name>", "<local-command-")
-        ):
+        if isinstance(text_content, str) and is_system_command(text_content):
             continue
 
         # Update session timestamps
@@ -339,18 +379,18 @@ def parse_session(file_path: Path, project_name: str) -> Session:
             if not session.ended_at or timestamp > session.ended_at:
                 session.ended_at = timestamp
 
-        content = message_data.get("content", "")
-        msg_uuid = entry.get("uuid", str(uuid.uuid4()))
-
-        # Extract usage for assistant messages
-        usage = message_data.get("usage", {})
-        input_tokens = usage.get("input_tokens", 0)
-        output_tokens = usage.get("output_tokens", 0)
-        cache_tokens = usage.get("cache_read_input_tokens", 0)
+        msg_uuid = entry["uuid"] if "uuid" in entry else str(uuid.uuid4())
 
-        total_input += input_tokens
-        total_output += output_tokens
-        total_cache += cache_tokens
+        # Extract usage for assistant messages (user entries carry none)
+        usage = message_data.get("usage")
+        if usage:
+            input_tokens = usage.get("input_tokens", 0)
+            output_tokens = usage.get("output_tokens", 0)
+            total_input += input_tokens
+            total_output += output_tokens
+            total_cache += usage.get("cache_read_input_tokens", 0)
+        else:
+            input_tokens = output_tokens = 0
 
         # Get model from assistant messages
         model = message_data.get("model")
@@ -358,6 +398,7 @@ def parse_session(file_path: Path, project_name: str) -> Session:
             session.model = model
 
         # Determine message type
+        tool_calls = []
         if entry_type == "user":
             # Check if this is actually a tool result
             has_tool_result = False
@@ -384,7 +425,7 @@ def parse_session(file_path: Path, project_name: str) -> Session:
             tool_calls = extract_tool_calls(content, msg_uuid, session_id, timestamp)
             all_tool_calls.extend(tool_calls)
         else:
-            msg_type = entry_type or "unknown"
+            msg_type = _intern(entry_type or "unknown")
 
         # Check for image content
         msg_has_images = has_image_content(content)
@@ -395,7 +436,7 @@ def parse_session(file_path: Path, project_name: str) -> Session:
             type=msg_type,
             timestamp=timestamp,
             content=extract_text_content(content),
-            parent_uuid=entry.get("parentUuid"),
+            parent_uuid=get("parentUuid"),
             model=model,
             input_tokens=input_tokens if input_tokens else None,
             output_tokens=output_tokens if output_tokens else None,
@@ -403,12 +444,10 @@ def parse_session(file_path: Path, project_name: str) -> Session:
             if msg_type == "assistant"
             else None,
             stop_reason=message_data.get("stop_reason"),
-            is_sidechain=entry.get("isSidechain", False),
+            is_sidechain=get("isSidechain", False),
             is_compact_summary=is_compact_summary,
             has_images=msg_has_images,
-            tool_calls=extract_tool_calls(content, msg_uuid, session_id, timestamp)
-            if msg_type == "assistant"
-            else [],
+            tool_calls=tool_calls,
         )
         messages.append(message)
 
@@ -440,10 +479,12 @@ def discover_sessions(projects_dir: Path) -> Iterator[tuple[Path, str]]:
     if not projects_dir.exists():
         return
 
-    for project_dir in projects_dir.iterdir():
-        if not project_dir.is_dir():
-            continue
+    # os.scandir entries carry the file type from readdir, so is_dir()/is_file()
+    # don't need a stat call per entry the way Path.iterdir()/glob() do
+    with os.scandir(projects_dir) as project_entries:
+        project_dirs = [e for e in project_entries if e.is_dir()]
 
+    for project_dir in project_dirs:
         # Convert directory name to project name
         # e.g., "-Users-rishibaldawa-Development-myproject" -> "myproject"
         project_name = (
@@ -457,10 +498,24 @@ def discover_sessions(projects_dir: Path) -> Iterator[tuple[Path, str]]:
         if parts:
             project_name = Path(parts).name or project_name
 
-        for jsonl_file in project_dir.glob("*.jsonl"):
+        with os.scandir(project_dir.path) as file_entries:
+            jsonl_files = [
+                Path(e.path)
+                for e in file_entries
+                if e.name.endswith(".jsonl") and e.is_file()
+            ]
+        for jsonl_file in jsonl_files:
             yield jsonl_file, project_name
 
 
+# Temp directory prefixes, or a pytest temp directory anywhere in the path
+_TMP_DIR_RE = re.compile(
+    r"^(?:-tmp-|-var-folders-|-private-var-folders-|-private-tmp-)|pytest-",
+    re.IGNORECASE,
+)
+
+
+@lru_cache(maxsize=1024)
 def is_tmp_directory(dir_name: str) -> bool:
     """Check if a directory name represents a temp/pytest directory.
 
@@ -471,27 +526,30 @@ def is_tmp_directory(dir_name: str) -> bool:
     - -private-tmp-...
     - Anything containing 'pytest-'
     """
-    name_lower = dir_name.lower()
-
-    # Check for common temp directory patterns
-    tmp_prefixes = [
-        "-tmp-",
-        "-var-folders-",
-        "-private-var-folders-",
-        "-private-tmp-",
-    ]
+    return _TMP_DIR_RE.search(dir_name) is not None
 
-    for prefix in tmp_prefixes:
-        if name_lower.startswith(prefix):
-            return True
 
-    # Check for pytest temp directories anywhere in the path
-    if "pytest-" in name_lower:
-        return True
+# Common path prefixes to strip (case-insensitive): -home-, -mnt-c-Users-, -Users-
+_HOME_PREFIX_RE = re.compile(r"-(?:home|mnt-c-users|users)-", re.IGNORECASE)
 
-    return False
+# Common intermediate directories to skip
+_PROJECT_SKIP_DIRS = frozenset(
+    {
+        "projects",
+        "code",
+        "repos",
+        "src",
+        "dev",
+        "work",
+        "documents",
+        "development",
+        "github",
+        "git",
+    }
+)
 
 
+@lru_cache(maxsize=1024)
 def get_project_name_from_dir(dir_name: str) -> str:
     """Extract a readable project name from a project directory name.
 
@@ -503,37 +561,14 @@ def get_project_name_from_dir(dir_name: str) -> str:
     For nested paths under common roots, extracts the meaningful project portion.
     Based on simonw/claude-code-transcripts algorithm.
     """
-    # Common path prefixes to strip (case-insensitive matching)
-    prefixes_to_strip = [
-        "-home-",
-        "-mnt-c-Users-",
-        "-mnt-c-users-",
-        "-Users-",
-    ]
-
-    name = dir_name
-    for prefix in prefixes_to_strip:
-        if name.lower().startswith(prefix.lower()):
-            name = name[len(prefix) :]
-            break
+    # Strip a common home-directory prefix
+    match = _HOME_PREFIX_RE.match(dir_name)
+    name = dir_name[match.end() :] if match else dir_name
 
     # Split on dashes and find meaningful parts
     parts = name.split("-")
 
-    # Common intermediate directories to skip
-    skip_dirs = {
-        "projects",
-        "code",
-        "repos",
-        "src",
-        "dev",
-        "work",
-        "documents",
-        "development",
-        "github",
-        "git",
-    }
-
+    skip_dirs = _PROJECT_SKIP_DIRS
     # Find meaningful parts (after skipping username and common dirs)
     meaningful_parts = []
     found_project = False
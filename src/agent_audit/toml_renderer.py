@@ -1,10 +1,10 @@
 """Render sessions as TOML transcripts."""
 
 import json
-from datetime import datetime
 from pathlib import Path
 from typing import Optional
 
+from ._json import loads as _json_loads
 from .models import Session, ToolCall
 
 
@@ -18,14 +18,24 @@ def format_timestamp(iso_timestamp: Optional[str]) -> str:
 
 def escape_toml_string(s: str) -> str:
     """Escape a string for TOML basic string (double quotes)."""
+    # Backslashes must be escaped first. str.replace returns the original
+    # object when there is nothing to replace, so the common case (paths,
+    # branch names) does not copy; str.translate is markedly slower here.
     return s.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
 
 
 def render_tool_call_toml(
-    tool_call: ToolCall, result_content: Optional[str] = None
+    tool_call: ToolCall,
+    result_content: Optional[str] = None,
+    lines: Optional[list[str]] = None,
 ) -> list[str]:
-    """Render a tool call as TOML lines."""
-    lines = []
+    """Render a tool call as TOML lines.
+
+    When *lines* is given, the output is appended to it in place (and the
+    same list is returned) so callers can build one buffer for a session.
+    """
+    if lines is None:
+        lines = []
     lines.append("[[turns.assistant.tool_calls]]")
     lines.append(f'tool = "{tool_call.tool_name}"')
     lines.append(f'id = "{tool_call.id}"')
@@ -34,8 +44,8 @@ def render_tool_call_toml(
 
     # Parse input JSON
     try:
-        input_data = json.loads(tool_call.input_json)
-    except json.JSONDecodeError:
+        input_data = _json_loads(tool_call.input_json)
+    except ValueError:
         input_data = {"raw": tool_call.input_json}
 
     # Render input as inline table or sub-table depending on complexity
@@ -73,8 +83,7 @@ def render_session_toml(session: Session) -> str:
     lines = []
 
     # Session metadata
-    lines.append("[session]")
-    lines.append(f'id = "{session.id}"')
+    lines.append(f'[session]\nid = "{session.id}"')
     if session.slug:
         lines.append(f'slug = "{escape_toml_string(session.slug)}"')
     lines.append(f'project = "{session.project}"')
@@ -85,9 +94,7 @@ def render_session_toml(session: Session) -> str:
     if session.git_branch:
         lines.append(f'git_branch = "{escape_toml_string(session.git_branch)}"')
     if session.summary:
-        lines.append("summary = '''")
-        lines.append(session.summary)
-        lines.append("'''")
+        lines.append(f"summary = '''\n{session.summary}\n'''")
     if session.started_at:
         lines.append(f'started_at = "{format_timestamp(session.started_at)}"')
     if session.ended_at:
@@ -96,13 +103,16 @@ def render_session_toml(session: Session) -> str:
         lines.append(f'model = "{session.model}"')
     if session.claude_version:
         lines.append(f'claude_version = "{session.claude_version}"')
-    lines.append(f"input_tokens = {session.total_input_tokens}")
-    lines.append(f"output_tokens = {session.total_output_tokens}")
-    lines.append(f"cache_read_tokens = {session.total_cache_read_tokens}")
-    lines.append("")
+    lines.append(
+        f"input_tokens = {session.total_input_tokens}\n"
+        f"output_tokens = {session.total_output_tokens}\n"
+        f"cache_read_tokens = {session.total_cache_read_tokens}\n"
+    )
 
-    # Build tool results lookup
-    tool_results_by_call_id = {tr.tool_call_id: tr for tr in session.tool_results}
+    # Build tool results lookup (content only; that's all the renderer needs)
+    tool_results_by_call_id = {
+        tr.tool_call_id: tr.content for tr in session.tool_results
+    }
 
     # Group messages into turns
     turn_number = 0
@@ -127,35 +137,29 @@ def render_session_toml(session: Session) -> str:
             return
 
         turn_number += 1
-        lines.append("[[turns]]")
-        lines.append(f"number = {turn_number}")
         if current_user_timestamp:
-            lines.append(f'timestamp = "{format_timestamp(current_user_timestamp)}"')
-        lines.append("")
+            lines.append(
+                f"[[turns]]\nnumber = {turn_number}\n"
+                f'timestamp = "{format_timestamp(current_user_timestamp)}"\n'
+            )
+        else:
+            lines.append(f"[[turns]]\nnumber = {turn_number}\n")
 
         if current_user_content:
-            lines.append("[turns.user]")
-            lines.append("content = '''")
-            lines.append(current_user_content)
-            lines.append("'''")
-            lines.append("")
+            lines.append(f"[turns.user]\ncontent = '''\n{current_user_content}\n'''\n")
 
         if pending_assistant_content or pending_assistant_thinking:
             lines.append("[turns.assistant]")
             combined_content = "\n".join(pending_assistant_content)
             if combined_content.strip():
-                lines.append("content = '''")
-                lines.append(combined_content)
-                lines.append("'''")
+                lines.append(f"content = '''\n{combined_content}\n'''")
             combined_thinking = "\n".join(pending_assistant_thinking)
             if combined_thinking.strip():
-                lines.append("thinking = '''")
-                lines.append(combined_thinking)
-                lines.append("'''")
+                lines.append(f"thinking = '''\n{combined_thinking}\n'''")
             lines.append("")
 
         for tc, result in pending_tool_calls:
-            lines.extend(render_tool_call_toml(tc, result))
+            render_tool_call_toml(tc, result, lines)
             lines.append("")
 
         # Reset
@@ -179,9 +183,7 @@ def render_session_toml(session: Session) -> str:
                 pending_assistant_thinking.append(message.thinking)
 
             for tool_call in message.tool_calls:
-                result_content = None
-                if tool_call.id in tool_results_by_call_id:
-                    result_content = tool_results_by_call_id[tool_call.id].content
+                result_content = tool_results_by_call_id.get(tool_call.id)
                 pending_tool_calls.append((tool_call, result_content))
 
     # Flush final turn
@@ -196,15 +198,8 @@ def render_session_to_file(session: Session, output_dir: Path) -> Path:
     project_dir.mkdir(parents=True, exist_ok=True)
 
     # Generate filename
-    date_str = ""
-    if session.started_at:
-        try:
-            dt = datetime.fromisoformat(session.started_at.replace("Z", "+00:00"))
-            date_str = dt.strftime("%Y-%m-%d")
-        except ValueError:
-            date_str = session.started_at[:10]
-    else:
-        date_str = "unknown-date"
+    # ISO 8601 timestamps start with YYYY-MM-DD, so no need to parse them
+    date_str = session.started_at[:10] if session.started_at else "unknown-date"
 
     short_id = session.id[:8]
     filename = f"{date_str}-{short_id}.toml"
@@ -24,6 +24,10 @@ class TestExtractJson:
         assert '"data"' in result
         assert "Hope this helps" not in result
 
+    def test_prefers_json_block_after_bare_block(self):
+        response = 'Example:\n```\nls -la\n```\n\n```json\n{"key": 1}\n```'
+        assert AnalyzerClaudeClient.extract_json(response) == '{"key": 1}'
+
 
 class TestParseJsonResponse:
     def test_parses_valid_json_response(self):
@@ -6,11 +6,13 @@ from pathlib import Path
 import pytest
 from click.testing import CliRunner
 
-from agent_audit.cli import main
+from agent_audit.cli import _parse_in_order, main
+from agent_audit.parser import parse_session
 
 
-@pytest.fixture
+@pytest.fixture(scope="module")
 def runner():
+    """One stateless runner shared by every CLI test in this module."""
     return CliRunner()
 
 
@@ -64,3 +66,47 @@ class TestCli:
         result = runner.invoke(main, ["analyze", "--help"])
         assert result.exit_code == 0
         assert "--synthesize" in result.output
+
+
+class TestParseInOrder:
+    @pytest.fixture
+    def session_files(self, temp_archive_dir):
+        files = []
+        for name in ["a", "b", "c"]:
+            path = temp_archive_dir / f"session-{name}.jsonl"
+            path.write_text(
+                '{"type": "user", "uuid": "u-%s", "timestamp": "2026-01-01T10:00:00Z", '
+                '"message": {"role": "user", "content": "Hello"}}\n' % name
+            )
+            files.append((path, "test-project"))
+        # A missing file fails to parse without stopping the others
+        files.insert(1, (temp_archive_dir / "missing.jsonl", "test-project"))
+        return files
+
+    @pytest.mark.parametrize("jobs", [1, 2])
+    def test_results_in_input_order(self, session_files, jobs):
+        results = list(_parse_in_order(parse_session, session_files, jobs))
+
+        assert [path for path, _, _ in results] == [path for path, _ in session_files]
+        assert [s.id if s else None for _, s, _ in results] == [
+            "session-a",
+            None,
+            "session-b",
+            "session-c",
+        ]
+        assert isinstance(results[1][2], FileNotFoundError)
+        assert all(error is None for i, (_, _, error) in enumerate(results) if i != 1)
+
+    def test_more_files_than_in_flight_window(self, session_files):
+        # jobs=2 keeps four files in flight, so the rest are queued as each
+        # result is consumed
+        files = session_files * 3
+        results = list(_parse_in_order(parse_session, files, 2))
+
+        assert [path for path, _, _ in results] == [path for path, _ in files]
+        expected_ok = [True, False, True, True] * 3
+        assert [error is None for _, _, error in results] == expected_ok
+
+    def test_sync_rejects_zero_jobs(self, runner):
+        result = runner.invoke(main, ["sync", "--jobs", "0"])
+        assert result.exit_code != 0
@@ -29,6 +29,10 @@ class TestExtractTomlFromSynthesis:
         doc = "# Just markdown\n\nNo TOML here.\n"
         assert _extract_toml_from_synthesis(doc) is None
 
+    def test_returns_none_for_unclosed_block(self):
+        doc = '# Synthesis\n\n```toml\n[section]\nkey = """\n```\n'
+        assert _extract_toml_from_synthesis(doc) is None
+
 
 class TestReplaceTomlInSynthesis:
     def test_extract_after_replace_returns_new_content(self):
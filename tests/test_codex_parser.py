@@ -1,9 +1,11 @@
 """Tests for Codex parser."""
 
+import itertools
 import json
-import tempfile
 from pathlib import Path
 
+import pytest
+
 from agent_audit.codex_parser import (
     parse_codex_session,
     discover_codex_sessions,
@@ -12,15 +14,27 @@ from agent_audit.codex_parser import (
 
 
 def _write_jsonl(lines: list[dict], path: Path):
-    with open(path, "w") as f:
-        for obj in lines:
-            f.write(json.dumps(obj) + "\n")
+    # Build the whole file in memory and write it once
+    path.write_text("".join(json.dumps(obj) + "\n" for obj in lines))
+
+
+@pytest.fixture
+def make_rollout(tmp_path):
+    """Return a builder that writes a rollout to a fresh JSONL file."""
+    counter = itertools.count()
+
+    def _make(rollout: list[dict]) -> Path:
+        path = tmp_path / f"rollout-{next(counter)}.jsonl"
+        _write_jsonl(rollout, path)
+        return path
+
+    return _make
 
 
 class TestUserMessageDeduplication:
     """Duplicate user messages from event_msg and response_item are deduplicated."""
 
-    def test_duplicate_user_message_produces_single_entry(self):
+    def test_duplicate_user_message_produces_single_entry(self, make_rollout):
         rollout = [
             {
                 "type": "event_msg",
@@ -37,17 +51,14 @@ class TestUserMessageDeduplication:
                 },
             },
         ]
-        with tempfile.NamedTemporaryFile(suffix=".jsonl", delete=False) as f:
-            path = Path(f.name)
-        _write_jsonl(rollout, path)
+        path = make_rollout(rollout)
 
         session = parse_codex_session(path, "proj")
-        path.unlink()
 
         user_msgs = [m for m in session.messages if m.type == "user"]
         assert len(user_msgs) == 1
 
-    def test_different_user_messages_are_not_deduped(self):
+    def test_different_user_messages_are_not_deduped(self, make_rollout):
         rollout = [
             {
                 "type": "event_msg",
@@ -60,219 +71,125 @@ class TestUserMessageDeduplication:
                 "payload": {"type": "user_message", "message": "second question"},
             },
         ]
-        with tempfile.NamedTemporaryFile(suffix=".jsonl", delete=False) as f:
-            path = Path(f.name)
-        _write_jsonl(rollout, path)
+        path = make_rollout(rollout)
 
         session = parse_codex_session(path, "proj")
-        path.unlink()
 
         user_msgs = [m for m in session.messages if m.type == "user"]
         assert len(user_msgs) == 2
 
 
-class TestRepoExtraction:
-    def test_https_url(self):
-        rollout = [
-            {
-                "type": "session_meta",
-                "timestamp": "2026-01-01T00:00:00Z",
-                "payload": {
-                    "cwd": "/proj",
-                    "git": {"branch": "main", "repository_url": "https://github.com/acme/repo.git"},
+class TestMalformedLines:
+    def test_skips_invalid_json_and_utf8(self, make_rollout):
+        path = make_rollout(
+            [
+                {
+                    "type": "event_msg",
+                    "timestamp": "2026-01-01T00:00:00Z",
+                    "payload": {"type": "user_message", "message": "still parsed"},
                 },
-            },
-        ]
-        with tempfile.NamedTemporaryFile(suffix=".jsonl", delete=False) as f:
-            path = Path(f.name)
-        _write_jsonl(rollout, path)
-
-        session = parse_codex_session(path, "proj")
-        path.unlink()
-        assert session.repo == "acme/repo"
-        assert session.repo_platform == "github"
-
-    def test_ssh_url(self):
-        rollout = [
-            {
-                "type": "session_meta",
-                "timestamp": "2026-01-01T00:00:00Z",
-                "payload": {
-                    "cwd": "/proj",
-                    "git": {"branch": "main", "repository_url": "git@github.com:acme/repo.git"},
-                },
-            },
-        ]
-        with tempfile.NamedTemporaryFile(suffix=".jsonl", delete=False) as f:
-            path = Path(f.name)
-        _write_jsonl(rollout, path)
-
-        session = parse_codex_session(path, "proj")
-        path.unlink()
-        assert session.repo == "acme/repo"
-        assert session.repo_platform == "github"
-
-    def test_gitlab_url_produces_repo(self):
-        rollout = [
-            {
-                "type": "session_meta",
-                "timestamp": "2026-01-01T00:00:00Z",
-                "payload": {
-                    "cwd": "/proj",
-                    "git": {"branch": "main", "repository_url": "https://gitlab.com/org/repo.git"},
-                },
-            },
-        ]
-        with tempfile.NamedTemporaryFile(suffix=".jsonl", delete=False) as f:
-            path = Path(f.name)
-        _write_jsonl(rollout, path)
-
-        session = parse_codex_session(path, "proj")
-        path.unlink()
-        assert session.repo == "org/repo"
-        assert session.repo_platform == "gitlab"
-
-    def test_gitlab_nested_groups(self):
-        rollout = [
-            {
-                "type": "session_meta",
-                "timestamp": "2026-01-01T00:00:00Z",
-                "payload": {
-                    "cwd": "/proj",
-                    "git": {"branch": "main", "repository_url": "https://gitlab.com/group/subgroup/project.git"},
-                },
-            },
-        ]
-        with tempfile.NamedTemporaryFile(suffix=".jsonl", delete=False) as f:
-            path = Path(f.name)
-        _write_jsonl(rollout, path)
+            ]
+        )
+        with open(path, "ab") as f:
+            f.write(b"not json\n")
+            f.write(b'{"type": "event_msg", "bad": "\xff"}\n')
 
         session = parse_codex_session(path, "proj")
-        path.unlink()
-        assert session.repo == "group/subgroup/project"
-        assert session.repo_platform == "gitlab"
 
-    def test_bitbucket_url(self):
-        rollout = [
-            {
-                "type": "session_meta",
-                "timestamp": "2026-01-01T00:00:00Z",
-                "payload": {
-                    "cwd": "/proj",
-                    "git": {"branch": "main", "repository_url": "https://bitbucket.org/team/repo.git"},
-                },
-            },
-        ]
-        with tempfile.NamedTemporaryFile(suffix=".jsonl", delete=False) as f:
-            path = Path(f.name)
-        _write_jsonl(rollout, path)
+        assert [m.content for m in session.messages] == ["still parsed"]
 
-        session = parse_codex_session(path, "proj")
-        path.unlink()
-        assert session.repo == "team/repo"
-        assert session.repo_platform == "bitbucket"
 
-    def test_unknown_host_url(self):
+class TestRepoExtraction:
+    @pytest.mark.parametrize(
+        "url,repo,platform",
+        [
+            ("https://github.com/acme/repo.git", "acme/repo", "github"),
+            ("git@github.com:acme/repo.git", "acme/repo", "github"),
+            ("https://gitlab.com/org/repo.git", "org/repo", "gitlab"),
+            (
+                "https://gitlab.com/group/subgroup/project.git",
+                "group/subgroup/project",
+                "gitlab",
+            ),
+            ("https://bitbucket.org/team/repo.git", "team/repo", "bitbucket"),
+            # Unrecognized host: repo is still extracted, platform is not
+            ("https://git.corp.example.com/team/repo.git", "team/repo", None),
+        ],
+        ids=["https", "ssh", "gitlab", "gitlab-nested", "bitbucket", "unknown-host"],
+    )
+    def test_repo_extraction(self, make_rollout, url, repo, platform):
         rollout = [
             {
                 "type": "session_meta",
                 "timestamp": "2026-01-01T00:00:00Z",
                 "payload": {
                     "cwd": "/proj",
-                    "git": {"branch": "main", "repository_url": "https://git.corp.example.com/team/repo.git"},
+                    "git": {"branch": "main", "repository_url": url},
                 },
             },
         ]
-        with tempfile.NamedTemporaryFile(suffix=".jsonl", delete=False) as f:
-            path = Path(f.name)
-        _write_jsonl(rollout, path)
+        path = make_rollout(rollout)
 
         session = parse_codex_session(path, "proj")
-        path.unlink()
-        assert session.repo == "team/repo"
-        assert session.repo_platform is None  # unrecognized host
+        assert session.repo == repo
+        assert session.repo_platform == platform
 
 
 class TestToolCallArgumentParsing:
-    def test_json_string_arguments(self):
-        """Tool call with arguments as a JSON string."""
-        rollout = [
-            {
-                "type": "response_item",
-                "timestamp": "2026-01-01T00:00:00Z",
-                "payload": {
+    @pytest.mark.parametrize(
+        "payload,expected",
+        [
+            # Arguments as a JSON string
+            (
+                {
                     "type": "function_call",
                     "call_id": "c1",
                     "name": "shell",
                     "arguments": '{"command": "ls -la"}',
                 },
-            },
-        ]
-        with tempfile.NamedTemporaryFile(suffix=".jsonl", delete=False) as f:
-            path = Path(f.name)
-        _write_jsonl(rollout, path)
-
-        session = parse_codex_session(path, "proj")
-        path.unlink()
-
-        assert len(session.tool_calls) == 1
-        parsed = json.loads(session.tool_calls[0].input_json)
-        assert parsed["command"] == "ls -la"
-
-    def test_dict_arguments(self):
-        """Tool call with arguments already as a dict (via 'input' key)."""
-        rollout = [
-            {
-                "type": "response_item",
-                "timestamp": "2026-01-01T00:00:00Z",
-                "payload": {
+                {"command": "ls -la"},
+            ),
+            # Arguments already a dict (via 'input' key)
+            (
+                {
                     "type": "custom_tool_call",
                     "call_id": "c2",
                     "name": "read_file",
                     "input": {"path": "/foo/bar.txt"},
                 },
-            },
-        ]
-        with tempfile.NamedTemporaryFile(suffix=".jsonl", delete=False) as f:
-            path = Path(f.name)
-        _write_jsonl(rollout, path)
-
-        session = parse_codex_session(path, "proj")
-        path.unlink()
-
-        assert len(session.tool_calls) == 1
-        parsed = json.loads(session.tool_calls[0].input_json)
-        assert parsed["path"] == "/foo/bar.txt"
-
-    def test_unparseable_string_arguments(self):
-        """Tool call with non-JSON string falls back to wrapping."""
-        rollout = [
-            {
-                "type": "response_item",
-                "timestamp": "2026-01-01T00:00:00Z",
-                "payload": {
+                {"path": "/foo/bar.txt"},
+            ),
+            # Non-JSON string falls back to wrapping, not a crash
+            (
+                {
                     "type": "function_call",
                     "call_id": "c3",
                     "name": "shell",
                     "arguments": "not valid json",
                 },
+                {"arguments": "not valid json"},
+            ),
+        ],
+        ids=["json-string", "dict-input", "unparseable-string"],
+    )
+    def test_tool_call_arguments(self, make_rollout, payload, expected):
+        rollout = [
+            {
+                "type": "response_item",
+                "timestamp": "2026-01-01T00:00:00Z",
+                "payload": payload,
             },
         ]
-        with tempfile.NamedTemporaryFile(suffix=".jsonl", delete=False) as f:
-            path = Path(f.name)
-        _write_jsonl(rollout, path)
+        path = make_rollout(rollout)
 
         session = parse_codex_session(path, "proj")
-        path.unlink()
 
         assert len(session.tool_calls) == 1
-        # Should be valid JSON (wrapped in some structure), not crash
-        parsed = json.loads(session.tool_calls[0].input_json)
-        assert isinstance(parsed, dict)
+        assert json.loads(session.tool_calls[0].input_json) == expected
 
 
 class TestToolResultErrorDetection:
-    def test_success_false_is_error(self):
+    def test_success_false_is_error(self, make_rollout):
         rollout = [
             {
                 "type": "response_item",
@@ -284,17 +201,14 @@ class TestToolResultErrorDetection:
                 },
             },
         ]
-        with tempfile.NamedTemporaryFile(suffix=".jsonl", delete=False) as f:
-            path = Path(f.name)
-        _write_jsonl(rollout, path)
+        path = make_rollout(rollout)
 
         session = parse_codex_session(path, "proj")
-        path.unlink()
 
         assert len(session.tool_results) == 1
         assert session.tool_results[0].is_error is True
 
-    def test_plain_string_output_is_not_error(self):
+    def test_plain_string_output_is_not_error(self, make_rollout):
         rollout = [
             {
                 "type": "response_item",
@@ -306,12 +220,9 @@ class TestToolResultErrorDetection:
                 },
             },
         ]
-        with tempfile.NamedTemporaryFile(suffix=".jsonl", delete=False) as f:
-            path = Path(f.name)
-        _write_jsonl(rollout, path)
+        path = make_rollout(rollout)
 
         session = parse_codex_session(path, "proj")
-        path.unlink()
 
         assert len(session.tool_results) == 1
         assert session.tool_results[0].is_error is False
@@ -327,8 +238,9 @@ class TestSessionDiscovery:
         assert get_session_id_from_filename(Path("random-file.jsonl")) is None
         assert get_session_id_from_filename(Path("session.json")) is None
 
-    def test_discover_scans_sessions_and_archived(self, tmp_path):
-        """discover_codex_sessions finds files in both sessions/ and archived_sessions/."""
+    @pytest.fixture
+    def discovery_tree(self, tmp_path):
+        """A Codex home with one live and one archived rollout."""
         sessions_dir = tmp_path / "sessions"
         sessions_dir.mkdir()
         archived_dir = tmp_path / "archived_sessions"
@@ -339,22 +251,42 @@ class TestSessionDiscovery:
                          (archived_dir, "rollout-2026-01-02T00-00-00-22222222-2222-2222-2222-222222222222.jsonl")]:
             _write_jsonl([{"type": "session_meta", "timestamp": "2026-01-01T00:00:00Z",
                            "payload": {"cwd": "/home/dev/proj"}}], d / name)
+        return tmp_path
+
+    @pytest.mark.parametrize(
+        "include_archived,expected", [(True, 2), (False, 1)], ids=["all", "live-only"]
+    )
+    def test_discover_respects_include_archived(
+        self, discovery_tree, include_archived, expected
+    ):
+        """discover_codex_sessions scans archived_sessions/ only when asked to."""
+        found = list(
+            discover_codex_sessions(
+                codex_home=discovery_tree, include_archived=include_archived
+            )
+        )
+        assert len(found) == expected
+
+    def test_discover_walks_nested_date_directories(self, tmp_path):
+        day_dir = tmp_path / "sessions" / "2026" / "01" / "01"
+        day_dir.mkdir(parents=True)
+        rollout = day_dir / "rollout-2026-01-01T00-00-00-11111111-1111-1111-1111-111111111111.jsonl"
+        _write_jsonl([{"type": "session_meta", "timestamp": "2026-01-01T00:00:00Z",
+                        "payload": {"cwd": "/home/dev/proj"}}], rollout)
+        (day_dir / "notes.jsonl").write_text("{}\n")
 
         found = list(discover_codex_sessions(codex_home=tmp_path, include_archived=True))
-        assert len(found) == 2
+        assert found == [(rollout, "proj")]
 
-    def test_discover_excludes_archived_when_flag_false(self, tmp_path):
+    def test_discover_does_not_follow_directory_symlinks(self, tmp_path):
         sessions_dir = tmp_path / "sessions"
-        sessions_dir.mkdir()
-        archived_dir = tmp_path / "archived_sessions"
-        archived_dir.mkdir()
-
-        _write_jsonl([{"type": "session_meta", "timestamp": "2026-01-01T00:00:00Z",
-                        "payload": {"cwd": "/proj"}}],
-                      sessions_dir / "rollout-2026-01-01T00-00-00-11111111-1111-1111-1111-111111111111.jsonl")
+        year_dir = sessions_dir / "2026"
+        year_dir.mkdir(parents=True)
+        rollout = year_dir / "rollout-2026-01-01T00-00-00-11111111-1111-1111-1111-111111111111.jsonl"
         _write_jsonl([{"type": "session_meta", "timestamp": "2026-01-01T00:00:00Z",
-                        "payload": {"cwd": "/proj"}}],
-                      archived_dir / "rollout-2026-01-02T00-00-00-22222222-2222-2222-2222-222222222222.jsonl")
+                        "payload": {"cwd": "/home/dev/proj"}}], rollout)
+        # A link back up the tree would otherwise be walked forever
+        (year_dir / "loop").symlink_to(sessions_dir, target_is_directory=True)
 
-        found = list(discover_codex_sessions(codex_home=tmp_path, include_archived=False))
-        assert len(found) == 1
+        found = list(discover_codex_sessions(codex_home=tmp_path))
+        assert found == [(rollout, "proj")]
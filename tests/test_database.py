@@ -1,25 +1,27 @@
 """Tests for SQLite database operations."""
 
-import tempfile
+import sqlite3
+from dataclasses import replace
 from pathlib import Path
 
 import pytest
 
-from agent_audit.database import Database
+from agent_audit.database import (
+    MIGRATIONS,
+    SCHEMA_INDEXES,
+    SCHEMA_TABLES,
+    Database,
+)
 from agent_audit.models import Commit, Message, Session, ToolCall, ToolResult
 
 
 @pytest.fixture
 def db():
-    """Create a temporary database for testing."""
-    with tempfile.NamedTemporaryFile(suffix=".db", delete=False) as f:
-        db_path = Path(f.name)
-
-    database = Database(db_path)
+    """Create a fresh in-memory database for testing."""
+    database = Database(Path(":memory:"))
     database.connect()
     yield database
     database.close()
-    db_path.unlink()
 
 
 @pytest.fixture
@@ -84,6 +86,20 @@ def sample_session():
     )
 
 
+def _make_messages(session_id: str, count: int, start: str) -> list[Message]:
+    """Build count alternating user/assistant messages, one second apart."""
+    return [
+        Message(
+            id=f"{session_id}-m{i}",
+            session_id=session_id,
+            type="user" if i % 2 == 0 else "assistant",
+            timestamp=f"{start}:{i:02d}Z",
+            content=f"Msg{i}",
+        )
+        for i in range(count)
+    ]
+
+
 class TestDatabase:
     def test_session_not_exists(self, db):
         assert db.session_exists("nonexistent") is False
@@ -112,6 +128,17 @@ class TestDatabase:
         sessions = db.get_sessions_by_project("other-project")
         assert len(sessions) == 0
 
+    def test_get_sessions_by_id_prefix(self, db):
+        db.insert_sessions(
+            Session(id=session_id, project="test-project")
+            for session_id in ["abc-1", "abc-2", "ABC-3", "a*c-4", "xyz-5"]
+        )
+
+        ids = {s["id"] for s in db.get_sessions_by_id_prefix("abc")}
+        assert ids == {"abc-1", "abc-2"}
+        assert [s["id"] for s in db.get_sessions_by_id_prefix("a*")] == ["a*c-4"]
+        assert db.get_sessions_by_id_prefix("nope") == []
+
     def test_get_messages_for_session(self, db, sample_session):
         db.insert_session(sample_session)
         messages = db.get_messages_for_session("test-session-123")
@@ -133,6 +160,46 @@ class TestDatabase:
         assert messages[1]["stop_reason"] == "end_turn"
         assert messages[1]["is_sidechain"] == 0  # SQLite stores bool as 0/1
 
+    def test_get_first_user_messages(self, db, sample_session):
+        db.insert_session(sample_session)
+        other = Session(
+            id="other-session",
+            project="test-project",
+            messages=[
+                Message(
+                    id="other-1",
+                    session_id="other-session",
+                    type="user",
+                    timestamp="2026-01-02T10:00:02Z",
+                    content="Second prompt",
+                ),
+                Message(
+                    id="other-2",
+                    session_id="other-session",
+                    type="user",
+                    timestamp="2026-01-02T10:00:00Z",
+                    content="",
+                ),
+                Message(
+                    id="other-3",
+                    session_id="other-session",
+                    type="user",
+                    timestamp="2026-01-02T10:00:01Z",
+                    content="First prompt",
+                ),
+            ],
+        )
+        db.insert_session(other)
+
+        first = db.get_first_user_messages(
+            ["test-session-123", "other-session", "missing"]
+        )
+        assert first == {
+            "test-session-123": "Hello",
+            "other-session": "First prompt",
+        }
+        assert db.get_first_user_messages([]) == {}
+
     def test_get_tool_calls_for_session(self, db, sample_session):
         db.insert_session(sample_session)
         tool_calls = db.get_tool_calls_for_session("test-session-123")
@@ -159,13 +226,41 @@ class TestDatabase:
         db.insert_session(sample_session)
 
         # Modify and re-insert
-        sample_session.total_input_tokens = 999
-        db.insert_session(sample_session)
+        db.insert_session(replace(sample_session, total_input_tokens=999))
 
         sessions = db.get_all_sessions()
         assert len(sessions) == 1
         assert sessions[0]["total_input_tokens"] == 999
 
+    def test_insert_sessions(self, db, sample_session):
+        other = Session(id="other-session", project="other-project")
+        db.insert_sessions([sample_session, other])
+
+        assert set(db.get_session_ids()) == {"test-session-123", "other-session"}
+        assert len(db.get_messages_for_session("test-session-123")) == 2
+        assert len(db.get_tool_calls_for_session("test-session-123")) == 1
+
+    def test_insert_sessions_rolls_back_on_error(self, db, sample_session):
+        # Message pointing at a session that doesn't exist violates the foreign key
+        broken = Session(
+            id="broken-session",
+            project="test-project",
+            messages=[
+                Message(
+                    id="orphan",
+                    session_id="missing-session",
+                    type="user",
+                    timestamp="2025-01-01T10:00:00Z",
+                    content="Hello",
+                )
+            ],
+        )
+
+        with pytest.raises(sqlite3.IntegrityError):
+            db.insert_sessions([sample_session, broken])
+
+        assert db.get_session_ids() == []
+
     def test_append_only_sync_preserves_old_messages(self, db):
         """Test that re-inserting a session with different messages preserves all messages.
 
@@ -326,15 +421,42 @@ class TestDatabase:
         assert session["total_input_tokens"] == 200
         assert session["total_output_tokens"] == 100
 
-    def test_context_manager(self, sample_session):
-        with tempfile.NamedTemporaryFile(suffix=".db", delete=False) as f:
-            db_path = Path(f.name)
-
-        with Database(db_path) as db:
+    def test_context_manager(self, sample_session, tmp_path):
+        with Database(tmp_path / "archive.db") as db:
             db.insert_session(sample_session)
             assert db.session_exists("test-session-123")
 
-        db_path.unlink()
+    def test_new_schema_matches_migrated_schema(self, db):
+        """New archives skip MIGRATIONS, so SCHEMA_TABLES must already match."""
+        migrated = sqlite3.connect(":memory:")
+        migrated.executescript(SCHEMA_TABLES)
+        for migration in MIGRATIONS:
+            try:
+                migrated.execute(migration)
+            except sqlite3.OperationalError:
+                pass
+        migrated.executescript(SCHEMA_INDEXES)
+
+        query = "SELECT type, name, sql FROM sqlite_master ORDER BY type, name"
+        expected = [tuple(row) for row in migrated.execute(query)]
+        assert [tuple(row) for row in db.conn.execute(query)] == expected
+
+    def test_per_session_reads_need_no_sort(self, db):
+        plan = db.conn.execute(
+            "EXPLAIN QUERY PLAN "
+            "SELECT * FROM messages WHERE session_id = ? ORDER BY timestamp",
+            ("s1",),
+        ).fetchall()
+        details = " ".join(row["detail"] for row in plan)
+        assert "idx_messages_session_ts" in details
+        assert "TEMP B-TREE" not in details
+
+    def test_on_disk_database_uses_wal(self, tmp_path):
+        with Database(tmp_path / "archive.db") as db:
+            journal_mode = db.conn.execute("PRAGMA journal_mode").fetchone()[0]
+            synchronous = db.conn.execute("PRAGMA synchronous").fetchone()[0]
+        assert journal_mode == "wal"
+        assert synchronous == 1  # NORMAL
 
     def test_stores_parent_session_id(self, db):
         """Test that parent_session_id is stored correctly for agent sessions."""
@@ -349,8 +471,7 @@ class TestDatabase:
             parent_session_id="parent-session",
             started_at="2026-01-01T10:01:00Z",
         )
-        db.insert_session(parent_session)
-        db.insert_session(child_session)
+        db.insert_sessions([parent_session, child_session])
 
         sessions = db.get_all_sessions()
         child = next(s for s in sessions if s["id"] == "child-session")
@@ -373,10 +494,7 @@ class TestDatabase:
         )
         other = Session(id="other", project="p", started_at="2026-01-01T10:03:00Z")
 
-        db.insert_session(parent)
-        db.insert_session(child1)
-        db.insert_session(child2)
-        db.insert_session(other)
+        db.insert_sessions([parent, child1, child2, other])
 
         children = db.get_child_sessions("parent")
         assert len(children) == 2
@@ -393,9 +511,7 @@ class TestDatabase:
             started_at="2026-01-01T10:02:00Z",
         )
 
-        db.insert_session(root1)
-        db.insert_session(root2)
-        db.insert_session(child)
+        db.insert_sessions([root1, root2, child])
 
         roots = db.get_root_sessions()
         assert len(roots) == 2
@@ -417,9 +533,7 @@ class TestDatabase:
             started_at="2026-01-01T10:02:00Z",
         )
 
-        db.insert_session(root)
-        db.insert_session(child1)
-        db.insert_session(grandchild)
+        db.insert_sessions([root, child1, grandchild])
 
         tree = db.get_session_tree("root")
         assert tree["session"]["id"] == "root"
@@ -428,6 +542,38 @@ class TestDatabase:
         assert len(tree["children"][0]["children"]) == 1
         assert tree["children"][0]["children"][0]["session"]["id"] == "grandchild"
 
+    def test_get_session_tree_orders_children_and_stops_on_cycles(self, db):
+        db.insert_sessions(
+            [
+                Session(id="root", project="p", started_at="2026-01-01T10:00:00Z"),
+                Session(
+                    id="late",
+                    project="p",
+                    parent_session_id="root",
+                    started_at="2026-01-01T10:05:00Z",
+                ),
+                Session(
+                    id="early",
+                    project="p",
+                    parent_session_id="root",
+                    started_at="2026-01-01T10:01:00Z",
+                ),
+                Session(id="other", project="p", started_at="2026-01-01T09:00:00Z"),
+                # a <-> b reference each other
+                Session(id="a", project="p", parent_session_id="b"),
+                Session(id="b", project="p", parent_session_id="a"),
+            ]
+        )
+
+        tree = db.get_session_tree("root")
+        assert [c["session"]["id"] for c in tree["children"]] == ["early", "late"]
+
+        cycle = db.get_session_tree("a")
+        assert cycle["children"][0]["session"]["id"] == "b"
+        assert cycle["children"][0]["children"] == []
+
+        assert db.get_session_tree("missing") == {}
+
     def test_get_project_metrics(self, db):
         """Test getting aggregate metrics for a project."""
         # Create 2 sessions with multiple messages
@@ -530,9 +676,7 @@ class TestDatabase:
             total_output_tokens=999,
         )
 
-        db.insert_session(session1)
-        db.insert_session(session2)
-        db.insert_session(other_session)
+        db.insert_sessions([session1, session2, other_session])
 
         metrics = db.get_project_metrics("my-project")
 
@@ -563,22 +707,7 @@ class TestDatabase:
                 project="p1",
                 started_at="2026-01-01T10:00:00Z",
                 total_output_tokens=100,
-                messages=[
-                    Message(
-                        id="m1",
-                        session_id="s1",
-                        type="user",
-                        timestamp="2026-01-01T10:00:00Z",
-                        content="Hi",
-                    ),
-                    Message(
-                        id="m2",
-                        session_id="s1",
-                        type="assistant",
-                        timestamp="2026-01-01T10:00:01Z",
-                        content="Hello",
-                    ),
-                ],
+                messages=_make_messages("s1", 2, "2026-01-01T10:00"),
             ),
             # Medium session: 4 messages
             Session(
@@ -586,36 +715,7 @@ class TestDatabase:
                 project="p1",
                 started_at="2026-01-01T11:00:00Z",
                 total_output_tokens=500,
-                messages=[
-                    Message(
-                        id="m3",
-                        session_id="s2",
-                        type="user",
-                        timestamp="2026-01-01T11:00:00Z",
-                        content="Help",
-                    ),
-                    Message(
-                        id="m4",
-                        session_id="s2",
-                        type="assistant",
-                        timestamp="2026-01-01T11:00:01Z",
-                        content="Sure",
-                    ),
-                    Message(
-                        id="m5",
-                        session_id="s2",
-                        type="user",
-                        timestamp="2026-01-01T11:00:02Z",
-                        content="More",
-                    ),
-                    Message(
-                        id="m6",
-                        session_id="s2",
-                        type="assistant",
-                        timestamp="2026-01-01T11:00:03Z",
-                        content="Ok",
-                    ),
-                ],
+                messages=_make_messages("s2", 4, "2026-01-01T11:00"),
             ),
             # Large session: 6 messages
             Session(
@@ -623,50 +723,7 @@ class TestDatabase:
                 project="p2",
                 started_at="2026-01-01T12:00:00Z",
                 total_output_tokens=1000,
-                messages=[
-                    Message(
-                        id="m7",
-                        session_id="s3",
-                        type="user",
-                        timestamp="2026-01-01T12:00:00Z",
-                        content="A",
-                    ),
-                    Message(
-                        id="m8",
-                        session_id="s3",
-                        type="assistant",
-                        timestamp="2026-01-01T12:00:01Z",
-                        content="B",
-                    ),
-                    Message(
-                        id="m9",
-                        session_id="s3",
-                        type="user",
-                        timestamp="2026-01-01T12:00:02Z",
-                        content="C",
-                    ),
-                    Message(
-                        id="m10",
-                        session_id="s3",
-                        type="assistant",
-                        timestamp="2026-01-01T12:00:03Z",
-                        content="D",
-                    ),
-                    Message(
-                        id="m11",
-                        session_id="s3",
-                        type="user",
-                        timestamp="2026-01-01T12:00:04Z",
-                        content="E",
-                    ),
-                    Message(
-                        id="m12",
-                        session_id="s3",
-                        type="assistant",
-                        timestamp="2026-01-01T12:00:05Z",
-                        content="F",
-                    ),
-                ],
+                messages=_make_messages("s3", 6, "2026-01-01T12:00"),
             ),
             # Very large session: 10 messages
             Session(
@@ -674,21 +731,11 @@ class TestDatabase:
                 project="p2",
                 started_at="2026-01-01T13:00:00Z",
                 total_output_tokens=2000,
-                messages=[
-                    Message(
-                        id=f"m{i}",
-                        session_id="s4",
-                        type="user" if i % 2 == 0 else "assistant",
-                        timestamp=f"2026-01-01T13:00:{i:02d}Z",
-                        content=f"Msg{i}",
-                    )
-                    for i in range(13, 23)
-                ],
+                messages=_make_messages("s4", 10, "2026-01-01T13:00"),
             ),
         ]
 
-        for session in sessions:
-            db.insert_session(session)
+        db.insert_sessions(sessions)
 
         percentiles = db.get_global_percentiles()
 
@@ -728,108 +775,21 @@ class TestDatabase:
                 project="my-project",
                 started_at="2026-01-01T10:00:00Z",
                 total_output_tokens=100,
-                messages=[
-                    Message(
-                        id="m1",
-                        session_id="s1",
-                        type="user",
-                        timestamp="2026-01-01T10:00:00Z",
-                        content="Hi",
-                    ),
-                    Message(
-                        id="m2",
-                        session_id="s1",
-                        type="assistant",
-                        timestamp="2026-01-01T10:00:01Z",
-                        content="Hello",
-                    ),
-                ],
+                messages=_make_messages("s1", 2, "2026-01-01T10:00"),
             ),
             Session(
                 id="s2",
                 project="my-project",
                 started_at="2026-01-01T11:00:00Z",
                 total_output_tokens=500,
-                messages=[
-                    Message(
-                        id="m3",
-                        session_id="s2",
-                        type="user",
-                        timestamp="2026-01-01T11:00:00Z",
-                        content="Help",
-                    ),
-                    Message(
-                        id="m4",
-                        session_id="s2",
-                        type="assistant",
-                        timestamp="2026-01-01T11:00:01Z",
-                        content="Sure",
-                    ),
-                    Message(
-                        id="m5",
-                        session_id="s2",
-                        type="user",
-                        timestamp="2026-01-01T11:00:02Z",
-                        content="More",
-                    ),
-                    Message(
-                        id="m6",
-                        session_id="s2",
-                        type="assistant",
-                        timestamp="2026-01-01T11:00:03Z",
-                        content="Ok",
-                    ),
-                ],
+                messages=_make_messages("s2", 4, "2026-01-01T11:00"),
             ),
             Session(
                 id="s3",
                 project="my-project",
                 started_at="2026-01-01T12:00:00Z",
                 total_output_tokens=1000,
-                messages=[
-                    Message(
-                        id="m7",
-                        session_id="s3",
-                        type="user",
-                        timestamp="2026-01-01T12:00:00Z",
-                        content="A",
-                    ),
-                    Message(
-                        id="m8",
-                        session_id="s3",
-                        type="assistant",
-                        timestamp="2026-01-01T12:00:01Z",
-                        content="B",
-                    ),
-                    Message(
-                        id="m9",
-                        session_id="s3",
-                        type="user",
-                        timestamp="2026-01-01T12:00:02Z",
-                        content="C",
-                    ),
-                    Message(
-                        id="m10",
-                        session_id="s3",
-                        type="assistant",
-                        timestamp="2026-01-01T12:00:03Z",
-                        content="D",
-                    ),
-                    Message(
-                        id="m11",
-                        session_id="s3",
-                        type="user",
-                        timestamp="2026-01-01T12:00:04Z",
-                        content="E",
-                    ),
-                    Message(
-                        id="m12",
-                        session_id="s3",
-                        type="assistant",
-                        timestamp="2026-01-01T12:00:05Z",
-                        content="F",
-                    ),
-                ],
+                messages=_make_messages("s3", 6, "2026-01-01T12:00"),
             ),
             # Different project - should not be included
             Session(
@@ -837,21 +797,11 @@ class TestDatabase:
                 project="other-project",
                 started_at="2026-01-01T13:00:00Z",
                 total_output_tokens=9999,
-                messages=[
-                    Message(
-                        id=f"m{i}",
-                        session_id="s4",
-                        type="user" if i % 2 == 0 else "assistant",
-                        timestamp=f"2026-01-01T13:00:{i:02d}Z",
-                        content=f"Msg{i}",
-                    )
-                    for i in range(13, 33)  # 20 messages
-                ],
+                messages=_make_messages("s4", 20, "2026-01-01T13:00"),
             ),
         ]
 
-        for session in sessions:
-            db.insert_session(session)
+        db.insert_sessions(sessions)
 
         stats = db.get_project_session_stats("my-project")
 
@@ -998,9 +948,7 @@ class TestDatabase:
         session2 = Session(id="s2", project="p2", repo="owner/repo")
         session3 = Session(id="s3", project="p3", repo="other/repo")
 
-        db.insert_session(session1)
-        db.insert_session(session2)
-        db.insert_session(session3)
+        db.insert_sessions([session1, session2, session3])
 
         sessions = db.get_sessions_by_repo("owner/repo")
         assert len(sessions) == 2
@@ -1044,9 +992,7 @@ class TestDatabase:
         session2 = Session(id="s2", project="p2", repo="owner/repo2")
         session3 = Session(id="s3", project="p3")  # No repo
 
-        db.insert_session(session1)
-        db.insert_session(session2)
-        db.insert_session(session3)
+        db.insert_sessions([session1, session2, session3])
 
         stats = db.get_stats()
         assert "repos" in stats
@@ -19,6 +19,7 @@ from agent_audit.debrief import (
     _describe_session_characteristics,
     _detect_key_moments,
     _extract_opening_context,
+    _reconstruct_session_from_db,
     build_metrics_summary,
     build_session_preanalysis,
     discover_related_sessions,
@@ -26,6 +27,7 @@ from agent_audit.debrief import (
     gather_pr_context,
     generate_session_guide,
     generate_slug,
+    load_session_guide_template,
     prepare_debrief,
 )
 
@@ -284,6 +286,23 @@ class TestDescribeSessionCharacteristics:
         assert "Long session" in result
         assert "150 messages" in result
 
+    def test_precomputed_tallies_match(self):
+        tool_calls = (
+            [_make_tool_call("Read", tc_id=f"r{i}") for i in range(4)]
+            + [_make_tool_call("Bash", tc_id=f"b{i}") for i in range(4)]
+            + [_make_tool_call("Edit", tc_id=f"e{i}") for i in range(2)]
+        )
+        commits = [_make_commit(f"Fix ruff lint {i}") for i in range(3)]
+        expected = _describe_session_characteristics([], tool_calls, commits)
+        result = _describe_session_characteristics(
+            [],
+            tool_calls,
+            commits,
+            tool_counts=_analyze_tool_patterns(tool_calls)["counts"],
+            commit_cats=_categorize_commits(commits),
+        )
+        assert result == expected
+
 
 class TestComputeAutonomyRatio:
     """Tests for _compute_autonomy_ratio."""
@@ -311,6 +330,32 @@ class TestComputeAutonomyRatio:
         assert ratio == 0.0
         assert "No messages" in desc
 
+    def test_uses_precomputed_user_count(self):
+        messages = (
+            [_make_message("user", "hi", msg_id=f"u{i}") for i in range(5)]
+            + [_make_message("assistant", "resp", msg_id=f"a{i}") for i in range(25)]
+        )
+        assert _compute_autonomy_ratio(messages, user_count=5) == (
+            _compute_autonomy_ratio(messages)
+        )
+
+    @pytest.mark.parametrize(
+        "user_count, label",
+        [
+            (0, "High AI autonomy"),
+            (9, "High AI autonomy"),
+            (10, "Moderate autonomy"),
+            (25, "Collaborative"),
+            (49, "Collaborative"),
+            (50, "User-driven"),
+            (100, "User-driven"),
+        ],
+    )
+    def test_tier_boundaries(self, user_count, label):
+        messages = [_make_message("assistant", "resp", msg_id=f"a{i}") for i in range(100)]
+        _, desc = _compute_autonomy_ratio(messages, user_count=user_count)
+        assert desc == f"{label} — {user_count} user messages in 100 total"
+
 
 class TestAnalyzeToolPatterns:
     """Tests for _analyze_tool_patterns."""
@@ -352,6 +397,14 @@ class TestAnalyzeToolPatterns:
         assert ("Bash", "Read", "Edit") in trigrams
         assert trigrams[("Bash", "Read", "Edit")] == 2
 
+    def test_no_trigrams_for_two_calls(self):
+        tool_calls = [
+            _make_tool_call("Bash", tc_id="1"),
+            _make_tool_call("Read", tc_id="2"),
+        ]
+        result = _analyze_tool_patterns(tool_calls)
+        assert result["top_trigrams"] == []
+
 
 class TestAnalyzeThinkingBlocks:
     """Tests for _analyze_thinking_blocks."""
@@ -469,6 +522,18 @@ class TestBuildTimelineSummary:
         result = _build_timeline_summary(messages, [])
         assert "2 distinct work sessions" in result
 
+    def test_unparseable_timestamp_does_not_split(self):
+        messages = [
+            _make_message("user", "start", msg_id="u1",
+                          timestamp="2026-02-10T10:00:00Z"),
+            _make_message("assistant", "resp", msg_id="a1",
+                          timestamp="not-a-timestamp"),
+            _make_message("user", "later", msg_id="u2",
+                          timestamp="2026-02-10T14:00:00Z"),
+        ]
+        result = _build_timeline_summary(messages, [])
+        assert "Single continuous session" in result
+
     def test_empty_messages(self):
         result = _build_timeline_summary([], [])
         assert "No messages" in result
@@ -733,6 +798,21 @@ class TestDiscoverRelatedSessions:
 
         assert len(result) == 5
 
+    def test_undated_sessions_rank_last(self):
+        primary = _make_session_dict(started_at="2026-02-10T12:00:00Z")
+        undated = _make_session_dict(session_id="undated", started_at=None)
+        dated = _make_session_dict(
+            session_id="dated",
+            started_at="2026-01-01T10:00:00Z",
+        )
+
+        db = MagicMock()
+        db.get_sessions_by_project.return_value = [primary, undated, dated]
+
+        result = discover_related_sessions(db, primary)
+
+        assert [s["id"] for s in result] == ["dated", "undated"]
+
     def test_handles_no_related_sessions(self):
         primary = _make_session_dict()
 
@@ -947,6 +1027,9 @@ class TestBuildMetricsSummary:
 class TestGenerateSessionGuide:
     """Tests for generate_session_guide."""
 
+    def test_template_read_once(self):
+        assert load_session_guide_template() is load_session_guide_template()
+
     def test_renders_template(self, tmp_path):
         primary = _make_session_dict()
         context_dir = tmp_path / "context"
@@ -1393,6 +1476,30 @@ class TestGatherPrContext:
         assert result == []
 
 
+class TestReconstructSessionFromDb:
+    """Tests for _reconstruct_session_from_db."""
+
+    def test_attaches_tool_calls_to_messages(self):
+        db = MagicMock()
+        db.get_messages_for_session.return_value = [
+            _make_message(msg_id="msg-1"),
+            _make_message(msg_type="assistant", msg_id="msg-2"),
+        ]
+        orphan = _make_tool_call(tc_id="tc-2")
+        orphan["message_id"] = "missing"
+        db.get_tool_calls_for_session.return_value = [
+            _make_tool_call(tc_id="tc-1"),
+            orphan,
+        ]
+        db.get_tool_results_for_session.return_value = []
+
+        session = _reconstruct_session_from_db(db, _make_session_dict())
+
+        assert [tc.id for tc in session.tool_calls] == ["tc-1", "tc-2"]
+        assert [tc.id for tc in session.messages[0].tool_calls] == ["tc-1"]
+        assert session.messages[1].tool_calls == []
+
+
 class TestPrepareDebrief:
     """Tests for prepare_debrief end-to-end."""
 
@@ -1434,6 +1541,7 @@ class TestPrepareDebrief:
         db.get_tool_calls_for_session.return_value = []
         db.get_tool_results_for_session.return_value = []
         db.get_commits_for_session.return_value = []
+        db.get_first_user_messages.return_value = {}
         return db
 
     def test_creates_output_directory(self, temp_archive_dir):
@@ -1602,13 +1710,17 @@ class TestPrepareDebrief:
         )
         db = self._setup_mock_db(primary)
         db.get_sessions_by_project.return_value = [primary, related]
+        db.get_first_user_messages.return_value = {
+            "related-session-id": "Fix the login bug",
+        }
         cfg = MagicMock()
         cfg.archive_dir = temp_archive_dir
 
         result = prepare_debrief(db, cfg, "abc123", archive_dir=temp_archive_dir)
 
         related_content = (result / "context" / "related-sessions.md").read_text()
-        assert "First prompt" in related_content
+        assert "**First prompt**: Fix the login bug" in related_content
+        db.get_first_user_messages.assert_called_once_with(["related-session-id"])
 
 
 class TestCliDebrief:
@@ -2,7 +2,6 @@
 
 import json
 import sqlite3
-import tempfile
 from pathlib import Path
 
 import pytest
@@ -185,34 +184,28 @@ CODEX_ROLLOUT_JSONL = [
 
 
 def _write_jsonl(lines: list[dict], path: Path):
-    with open(path, "w") as f:
-        for obj in lines:
-            f.write(json.dumps(obj) + "\n")
+    path.write_text("".join(json.dumps(obj) + "\n" for obj in lines), encoding="utf-8")
 
 
 @pytest.fixture
 def db():
-    with tempfile.NamedTemporaryFile(suffix=".db", delete=False) as f:
-        db_path = Path(f.name)
-    db = Database(db_path)
+    # In-memory: each test gets a fresh schema without touching disk
+    db = Database(Path(":memory:"))
     db.connect()
     yield db
     db.close()
-    db_path.unlink()
 
 
 class TestClaudeCodePipeline:
     """End-to-end: JSONL → parse → store → retrieve → render."""
 
-    def test_full_roundtrip_preserves_all_fields(self, db):
+    def test_full_roundtrip_preserves_all_fields(self, db, tmp_path):
         """Every field survives the parse → store → retrieve round-trip."""
-        with tempfile.NamedTemporaryFile(suffix=".jsonl", delete=False) as f:
-            jsonl_path = Path(f.name)
+        jsonl_path = tmp_path / "session.jsonl"
         _write_jsonl(CLAUDE_SESSION_JSONL, jsonl_path)
 
         # Parse
         session = parse_session(jsonl_path, "myproject")
-        jsonl_path.unlink()
 
         # Verify parse produced expected structure
         assert session.project == "myproject"
@@ -277,14 +270,12 @@ class TestClaudeCodePipeline:
         assert commits[0]["commit_hash"] == "abc1234"
         assert "login page" in commits[0]["message"].lower()
 
-    def test_rendered_toml_contains_key_content(self, db):
+    def test_rendered_toml_contains_key_content(self, db, tmp_path):
         """After round-trip, TOML rendering includes all critical content."""
-        with tempfile.NamedTemporaryFile(suffix=".jsonl", delete=False) as f:
-            jsonl_path = Path(f.name)
+        jsonl_path = tmp_path / "session.jsonl"
         _write_jsonl(CLAUDE_SESSION_JSONL, jsonl_path)
 
         session = parse_session(jsonl_path, "myproject")
-        jsonl_path.unlink()
 
         toml = render_session_toml(session)
 
@@ -299,18 +290,15 @@ class TestClaudeCodePipeline:
 class TestCodexPipeline:
     """End-to-end: Codex rollout JSONL → parse → store → retrieve."""
 
-    def test_full_roundtrip_preserves_all_fields(self, db):
+    def test_full_roundtrip_preserves_all_fields(self, db, tmp_path):
         """Parse a Codex rollout, store it, retrieve it, verify integrity."""
-        with tempfile.NamedTemporaryFile(
-            prefix="rollout-2026-02-01T09-00-00-",
-            suffix="-12345678-1234-1234-1234-123456789abc.jsonl",
-            delete=False,
-        ) as f:
-            rollout_path = Path(f.name)
+        rollout_path = (
+            tmp_path
+            / "rollout-2026-02-01T09-00-00-12345678-1234-1234-1234-123456789abc.jsonl"
+        )
         _write_jsonl(CODEX_ROLLOUT_JSONL, rollout_path)
 
         session = parse_codex_session(rollout_path, "codex-project")
-        rollout_path.unlink()
 
         # Verify parse
         assert session.agent_type == "codex"
@@ -353,7 +341,7 @@ class TestCodexPipeline:
         assert retrieved["model"] == "o3-mini"
         assert retrieved["total_input_tokens"] == 300
 
-    def test_codex_warmup_session_detected(self):
+    def test_codex_warmup_session_detected(self, tmp_path):
         """A Codex session whose first user message is 'warmup' is flagged."""
         warmup_rollout = [
             {
@@ -367,16 +355,14 @@ class TestCodexPipeline:
                 "payload": {"type": "user_message", "message": "warmup"},
             },
         ]
-        with tempfile.NamedTemporaryFile(suffix=".jsonl", delete=False) as f:
-            path = Path(f.name)
+        path = tmp_path / "session.jsonl"
         _write_jsonl(warmup_rollout, path)
 
         session = parse_codex_session(path, "proj")
-        path.unlink()
 
         assert session.is_warmup is True
 
-    def test_codex_empty_rollout_does_not_crash(self):
+    def test_codex_empty_rollout_does_not_crash(self, tmp_path):
         """An empty or metadata-only rollout produces a session with no messages."""
         empty_rollout = [
             {
@@ -385,12 +371,10 @@ class TestCodexPipeline:
                 "payload": {"cwd": "/home/dev/proj"},
             },
         ]
-        with tempfile.NamedTemporaryFile(suffix=".jsonl", delete=False) as f:
-            path = Path(f.name)
+        path = tmp_path / "session.jsonl"
         _write_jsonl(empty_rollout, path)
 
         session = parse_codex_session(path, "proj")
-        path.unlink()
 
         assert session.messages == []
         assert session.tool_calls == []
@@ -400,10 +384,9 @@ class TestCodexPipeline:
 class TestRegressionBugs:
     """Tests derived from real bugs found in git history."""
 
-    def test_migration_on_old_schema_adds_new_columns(self):
+    def test_migration_on_old_schema_adds_new_columns(self, tmp_path):
         """Regression for 250521c: migrations must apply to Phase 1 schema."""
-        with tempfile.NamedTemporaryFile(suffix=".db", delete=False) as f:
-            db_path = Path(f.name)
+        db_path = tmp_path / "archive.db"
 
         # Create a database with only the original (minimal) schema
         conn = sqlite3.connect(db_path)
@@ -503,7 +486,6 @@ class TestRegressionBugs:
         assert retrieved[0]["title"] == "Test title"
 
         db.close()
-        db_path.unlink()
 
     def test_render_reconstruction_includes_all_session_fields(self, db):
         """Regression for 57e69d6: all fields survive store → retrieve cycle."""
@@ -2,6 +2,7 @@
 
 import json
 import tempfile
+import uuid
 from pathlib import Path
 
 
@@ -17,12 +18,14 @@ from agent_audit.parser import (
     has_image_content,
     parse_jsonl_file,
     parse_session,
+    discover_sessions,
     get_project_name_from_dir,
+    is_system_command,
     is_tmp_directory,
     is_warmup_session,
     is_sidechain_session,
 )
-from agent_audit.models import Session, Message
+from agent_audit.models import Session, Message, parse_repo_url
 
 
 class TestExtractTextContent:
@@ -104,6 +107,15 @@ class TestExtractToolCalls:
         )
         assert len(calls) == 0
 
+    def test_interns_tool_names(self):
+        content = json.loads(
+            '[{"type": "tool_use", "name": "Grep"}, {"type": "tool_use", "name": "Grep"}]'
+        )
+        calls = extract_tool_calls(
+            content, "msg_1", "session_1", "2026-01-01T00:00:00Z"
+        )
+        assert calls[0].tool_name is calls[1].tool_name
+
 
 class TestExtractToolResults:
     def test_extracts_tool_result(self):
@@ -131,6 +143,27 @@ class TestExtractToolResults:
         results = extract_tool_results(content, "session_1", "2026-01-01T00:00:00Z")
         assert results[0].is_error is True
 
+    def test_truncates_long_content(self):
+        content = [{"type": "tool_result", "tool_use_id": "t", "content": "x" * 20000}]
+        results = extract_tool_results(content, "session_1", "2026-01-01T00:00:00Z")
+        assert results[0].content == "x" * 10000
+
+    def test_stringifies_block_list_content(self):
+        blocks = [{"type": "text", "text": "output"}]
+        content = [{"type": "tool_result", "tool_use_id": "t", "content": blocks}]
+        results = extract_tool_results(content, "session_1", "2026-01-01T00:00:00Z")
+        assert results[0].content == str(blocks)
+
+    def test_generates_distinct_uuid4_ids(self):
+        content = [
+            {"type": "tool_result", "tool_use_id": f"toolu_{i}", "content": "ok"}
+            for i in range(10)
+        ]
+        results = extract_tool_results(content, "session_1", "2026-01-01T00:00:00Z")
+        ids = [r.id for r in results]
+        assert len(set(ids)) == len(ids)
+        assert all(uuid.UUID(result_id).version == 4 for result_id in ids)
+
 
 class TestParseJsonlFile:
     def test_parses_valid_jsonl(self):
@@ -154,6 +187,43 @@ class TestParseJsonlFile:
             entries = list(parse_jsonl_file(Path(f.name)))
             assert len(entries) == 2
 
+    def test_skips_listed_types_before_decoding(self):
+        with tempfile.NamedTemporaryFile(mode="w", suffix=".jsonl", delete=False) as f:
+            f.write('{"type":"file-history-snapshot","snapshot":{}}\n')
+            f.write('{"type":"user","message":{"content":"hello"}}\n')
+            f.flush()
+
+            entries = list(
+                parse_jsonl_file(Path(f.name), skip_types=("file-history-snapshot",))
+            )
+            assert [e["type"] for e in entries] == ["user"]
+
+    def test_keeps_lines_with_skipped_type_nested(self):
+        with tempfile.NamedTemporaryFile(mode="w", suffix=".jsonl", delete=False) as f:
+            f.write(
+                '{"type":"user","message":{"content":['
+                '{"type":"file-history-snapshot"}]}}\n'
+            )
+            f.write(
+                '{"type":"assistant","message":{"content":'
+                '"see \\"type\\":\\"file-history-snapshot\\""}}\n'
+            )
+            f.flush()
+
+            entries = list(
+                parse_jsonl_file(Path(f.name), skip_types=("file-history-snapshot",))
+            )
+            assert [e["type"] for e in entries] == ["user", "assistant"]
+
+    def test_skips_invalid_utf8(self):
+        with tempfile.NamedTemporaryFile(mode="wb", suffix=".jsonl", delete=False) as f:
+            f.write(b'{"bad": "\xff"}\n')
+            f.write(b'{"good": true}\n')
+            f.flush()
+
+            entries = list(parse_jsonl_file(Path(f.name)))
+            assert entries == [{"good": True}]
+
 
 class TestParseSession:
     def test_parses_session(self):
@@ -368,6 +438,46 @@ class TestParseSession:
             session = parse_session(Path(f.name), "test-project")
             assert session.parent_session_id is None
 
+    def test_message_tool_calls_match_session_tool_calls(self):
+        with tempfile.NamedTemporaryFile(mode="w", suffix=".jsonl", delete=False) as f:
+            f.write(
+                json.dumps(
+                    {
+                        "type": "assistant",
+                        "uuid": "msg-1",
+                        "timestamp": "2026-01-01T10:00:00Z",
+                        "message": {
+                            "role": "assistant",
+                            "content": [
+                                {"type": "tool_use", "name": "Read", "input": {}}
+                            ],
+                        },
+                    }
+                )
+                + "\n"
+            )
+            f.flush()
+
+            session = parse_session(Path(f.name), "test-project")
+            assert len(session.tool_calls) == 1
+            assert session.messages[0].tool_calls[0] is session.tool_calls[0]
+
+
+class TestDiscoverSessions:
+    def test_finds_jsonl_files_in_project_dirs(self, tmp_path):
+        project_dir = tmp_path / "-home-user-myproject"
+        project_dir.mkdir()
+        (project_dir / "abc.jsonl").write_text("{}\n")
+        (project_dir / "notes.txt").write_text("ignored")
+        (project_dir / "nested.jsonl").mkdir()
+        (tmp_path / "stray.jsonl").write_text("{}\n")
+
+        found = list(discover_sessions(tmp_path))
+        assert found == [(project_dir / "abc.jsonl", "myproject")]
+
+    def test_missing_directory(self, tmp_path):
+        assert list(discover_sessions(tmp_path / "missing")) == []
+
 
 class TestGetProjectNameFromDir:
     def test_extracts_last_component(self):
@@ -652,6 +762,23 @@ class TestIsTmpDirectory:
         assert is_tmp_directory("-TMP-test") is True
         assert is_tmp_directory("-Private-Var-Folders-abc") is True
 
+    def test_prefixes_only_match_at_start(self):
+        assert is_tmp_directory("-home-user-tmp-project") is False
+        assert is_tmp_directory("-Users-john-var-folders-app") is False
+
+
+class TestIsSystemCommand:
+    def test_detects_command_name(self):
+        assert is_system_command("<command-name>/clear</command-name>") is True
+
+    def test_detects_local_command_with_leading_whitespace(self):
+        assert is_system_command("\n  <local-command-stdout>ok") is True
+
+    def test_rejects_regular_text(self):
+        assert is_system_command("please run <command-name>") is False
+        assert is_system_command("<div>html</div>") is False
+        assert is_system_command("") is False
+
 
 class TestExtractCommits:
     def test_extracts_commit_from_tool_result(self):
@@ -813,6 +940,15 @@ class TestExtractRepoFromSessionContext:
         assert extract_repo_from_session_context({}) == (None, None)
 
 
+class TestParseRepoUrl:
+    def test_ssh_url_with_uppercase_host(self):
+        assert parse_repo_url("git@GitHub.com:acme/repo.git") == ("acme/repo", "github")
+
+    def test_unrecognized_url_returns_none(self):
+        assert parse_repo_url("not a url") is None
+        assert parse_repo_url("") is None
+
+
 class TestHasImageContent:
     def test_detects_image_block(self):
         content = [
@@ -6,6 +6,7 @@ from agent_audit.analyzer.recommendations import (
     Recommendation,
     RecommendationCategory,
     RecommendationGenerator,
+    find_toml_block_span,
     parse_recommendations_from_synthesis,
 )
 
@@ -109,6 +110,31 @@ class TestRecommendation:
         assert "&" not in filename
         assert "!" not in filename
 
+    def test_output_filename_tracks_title_changes(self):
+        """The slug follows the current title, not the one at creation."""
+        rec = Recommendation(
+            category=RecommendationCategory.HOOK,
+            title="Lint Files",
+            description="Lint on save",
+        )
+        assert rec.output_filename == "hook-lint-files.md"
+        rec.title = "Format Files"
+        assert rec.output_filename == "hook-format-files.md"
+
+
+class TestFindTomlBlockSpan:
+    """Tests for locating the TOML block in synthesis markdown."""
+
+    def test_skips_fence_inside_multiline_string(self):
+        content = 'Intro\n```toml\ncontent = """\n```bash\nls\n```\n"""\n```\nOutro'
+        start, end = find_toml_block_span(content)
+        assert content[start:].startswith("```toml\n")
+        assert content[end:] == "\n```\nOutro"
+
+    def test_returns_none_without_complete_block(self):
+        assert find_toml_block_span("No TOML here") is None
+        assert find_toml_block_span("```toml\nkey = 1\n") is None
+
 
 class TestParseRecommendationsFromSynthesis:
     """Tests for parsing recommendations from synthesis files."""
@@ -177,6 +203,32 @@ description = "Second recommendation"
         assert recommendations[0].category == RecommendationCategory.WORKFLOW
         assert recommendations[1].category == RecommendationCategory.SKILL
 
+    def test_unknown_category_falls_back_to_workflow(self, tmp_path):
+        """Unknown and non-string categories become workflow."""
+        synthesis_content = """# Synthesis
+
+```toml
+[[recommendations]]
+category = "newsletter"
+title = "Unknown"
+
+[[recommendations]]
+category = ["skill"]
+title = "Array"
+
+[[recommendations]]
+title = "Missing"
+```
+"""
+        synthesis_path = tmp_path / "global-synthesis.md"
+        synthesis_path.write_text(synthesis_content)
+
+        recommendations = parse_recommendations_from_synthesis(synthesis_path)
+
+        assert [r.category for r in recommendations] == [
+            RecommendationCategory.WORKFLOW
+        ] * 3
+
     def test_parse_with_metadata(self, tmp_path):
         """Parse recommendations with metadata section."""
         synthesis_content = """# Synthesis
@@ -243,6 +295,32 @@ description = "Test"
 
         assert recommendations[0].category == RecommendationCategory.WORKFLOW
 
+    def test_parse_code_fence_inside_multiline_string(self, tmp_path):
+        """A ``` inside a triple-quoted string does not close the TOML block."""
+        synthesis_content = '''# Synthesis
+
+```toml
+[[recommendations]]
+category = "workflow"
+title = "Fenced"
+description = "Has code"
+content = """
+```bash
+make test
+```
+"""
+```
+
+Trailing notes.
+'''
+        synthesis_path = tmp_path / "global-synthesis.md"
+        synthesis_path.write_text(synthesis_content)
+
+        recommendations = parse_recommendations_from_synthesis(synthesis_path)
+
+        assert len(recommendations) == 1
+        assert "make test" in recommendations[0].content
+
 
 class TestRecommendationGenerator:
     """Tests for RecommendationGenerator class."""
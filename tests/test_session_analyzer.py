@@ -1,7 +1,7 @@
 """Tests for session analyzer module."""
 
 from pathlib import Path
-from unittest.mock import AsyncMock, MagicMock
+from unittest.mock import MagicMock
 
 import pytest
 
@@ -14,6 +14,18 @@ from agent_audit.analyzer.session_analyzer import (
 )
 
 
+class FakeClaudeClient:
+    """Plain stand-in for AnalyzerClaudeClient that records prompts."""
+
+    def __init__(self, response: str):
+        self.response = response
+        self.prompts: list[str] = []
+
+    async def query(self, prompt: str) -> str:
+        self.prompts.append(prompt)
+        return self.response
+
+
 class TestLoadSessionAnalysisTemplate:
     """Tests for loading the prompt template."""
 
@@ -63,6 +75,10 @@ class TestLoadSessionAnalysisTemplate:
         template = load_session_analysis_template()
         assert "[SQUARE BRACKETS" in template or "SQUARE BRACKETS" in template
 
+    def test_template_read_once(self):
+        """Repeated loads reuse the cached file contents."""
+        assert load_session_analysis_template() is load_session_analysis_template()
+
 
 class TestBuildSessionAnalysisPrompt:
     """Tests for building the analysis prompt."""
@@ -112,10 +128,8 @@ class TestSessionAnalyzer:
 
     @pytest.fixture
     def mock_client(self):
-        """Create a mock Claude client."""
-        client = MagicMock()
-        client.query = AsyncMock(return_value="# Analysis\n\nSome analysis content")
-        return client
+        """Create a fake Claude client."""
+        return FakeClaudeClient("# Analysis\n\nSome analysis content")
 
     @pytest.fixture
     def mock_db(self):
@@ -169,8 +183,8 @@ class TestSessionAnalyzer:
         mock_db.get_project_session_stats.assert_called_once_with("my-project")
 
         # Verify Claude was invoked
-        mock_client.query.assert_called_once()
-        prompt_arg = mock_client.query.call_args[0][0]
+        assert len(mock_client.prompts) == 1
+        prompt_arg = mock_client.prompts[-1]
         assert "my-project" in prompt_arg
         assert "/fake/toml/my-project" in prompt_arg
         # Check that global percentiles appear in prompt
@@ -208,7 +222,38 @@ class TestSessionAnalyzer:
         await analyzer.analyze_project("empty-project")
 
         # Should still call Claude even with empty project
-        mock_client.query.assert_called_once()
+        assert len(mock_client.prompts) == 1
+
+    @pytest.mark.asyncio
+    async def test_analyze_project_with_precomputed_metrics(self, mock_client, mock_db):
+        """Metrics passed in by the caller are not queried again."""
+        analyzer = SessionAnalyzer(
+            client=mock_client,
+            db=mock_db,
+            toml_dir=Path("/fake/toml"),
+        )
+        metrics = dict(mock_db.get_project_metrics.return_value, session_count=4242)
+
+        await analyzer.analyze_project("my-project", metrics)
+
+        mock_db.get_project_metrics.assert_not_called()
+        assert "4242" in mock_client.prompts[-1]
+
+    @pytest.mark.asyncio
+    async def test_global_percentiles_fetched_once(self, mock_client, mock_db):
+        """Global percentiles are shared across projects in one run."""
+        analyzer = SessionAnalyzer(
+            client=mock_client,
+            db=mock_db,
+            toml_dir=Path("/fake/toml"),
+        )
+
+        await analyzer.analyze_project("project-a")
+        await analyzer.analyze_project("project-b")
+
+        mock_db.get_global_percentiles.assert_called_once()
+        assert mock_db.get_project_session_stats.call_count == 2
+        assert "126" in mock_client.prompts[-1]
 
 
 class TestLoadGlobalSynthesisTemplate:
@@ -282,12 +327,8 @@ class TestSessionAnalyzerGlobalSynthesis:
 
     @pytest.fixture
     def mock_client(self):
-        """Create a mock Claude client."""
-        client = MagicMock()
-        client.query = AsyncMock(
-            return_value="# Global Synthesis\n\nCross-project patterns"
-        )
-        return client
+        """Create a fake Claude client."""
+        return FakeClaudeClient("# Global Synthesis\n\nCross-project patterns")
 
     @pytest.fixture
     def mock_db(self):
@@ -312,8 +353,8 @@ class TestSessionAnalyzerGlobalSynthesis:
         result = await analyzer.synthesize_global(analysis_dir)
 
         # Verify Claude was invoked with synthesis prompt
-        mock_client.query.assert_called_once()
-        prompt_arg = mock_client.query.call_args[0][0]
+        assert len(mock_client.prompts) == 1
+        prompt_arg = mock_client.prompts[-1]
         assert "project-a.md" in prompt_arg
         assert "project-b.md" in prompt_arg
         assert str(analysis_dir) in prompt_arg
@@ -340,7 +381,7 @@ class TestSessionAnalyzerGlobalSynthesis:
 
         await analyzer.synthesize_global(analysis_dir)
 
-        prompt_arg = mock_client.query.call_args[0][0]
+        prompt_arg = mock_client.prompts[-1]
         assert "project-a.md" in prompt_arg
         assert "project-b.txt" not in prompt_arg
         # Should exclude existing global synthesis file
@@ -1,6 +1,8 @@
 """Tests for TOML renderer."""
 
 import tempfile
+import tomllib
+from dataclasses import replace
 from pathlib import Path
 
 import pytest
@@ -11,6 +13,7 @@ from agent_audit.toml_renderer import (
     format_timestamp,
     render_session_toml,
     render_session_to_file,
+    render_tool_call_toml,
 )
 
 
@@ -36,6 +39,12 @@ class TestEscapeTomlString:
     def test_escapes_backslashes(self):
         assert escape_toml_string("path\\to\\file") == "path\\\\to\\\\file"
 
+    def test_escapes_backslash_before_quote(self):
+        assert escape_toml_string('a\\"b\n') == 'a\\\\\\"b\\n'
+
+    def test_returns_plain_string_unchanged(self):
+        assert escape_toml_string("/Users/me/project") == "/Users/me/project"
+
 
 @pytest.fixture
 def sample_session():
@@ -169,6 +178,74 @@ class TestRenderSessionToml:
         assert "Line 1\nLine 2\nLine 3" in toml
 
 
+class TestRenderToolCallToml:
+    def test_returns_new_list(self):
+        tool_call = ToolCall(
+            id="tool-1",
+            message_id="msg-1",
+            session_id="test",
+            tool_name="Bash",
+            input_json='{"command": "ls"}',
+        )
+        lines = render_tool_call_toml(tool_call, "out")
+        assert lines[0] == "[[turns.assistant.tool_calls]]"
+        assert 'command = "ls"' in lines
+
+    def test_appends_to_given_lines(self):
+        tool_call = ToolCall(
+            id="tool-1",
+            message_id="msg-1",
+            session_id="test",
+            tool_name="Bash",
+            input_json='{"command": "ls"}',
+        )
+        buffer = ["[session]"]
+        result = render_tool_call_toml(tool_call, None, buffer)
+        assert result is buffer
+        assert buffer[:2] == ["[session]", "[[turns.assistant.tool_calls]]"]
+
+    def test_invalid_input_json_rendered_raw(self):
+        tool_call = ToolCall(
+            id="tool-1",
+            message_id="msg-1",
+            session_id="test",
+            tool_name="Bash",
+            input_json="{not json",
+        )
+        lines = render_tool_call_toml(tool_call)
+        assert 'raw = "{not json"' in lines
+
+    def test_input_outside_orjson_range_still_parsed(self):
+        # NaN and integers wider than 64 bits are valid for json.loads but
+        # rejected by orjson; they must not fall back to the raw string
+        tool_call = ToolCall(
+            id="tool-1",
+            message_id="msg-1",
+            session_id="test",
+            tool_name="Bash",
+            input_json='{"timeout": NaN, "size": 123456789012345678901234567890}',
+        )
+        lines = render_tool_call_toml(tool_call)
+        assert "timeout = nan" in lines
+        assert "size = 123456789012345678901234567890" in lines
+
+    def test_complex_input_values_rendered_as_json(self):
+        tool_call = ToolCall(
+            id="tool-1",
+            message_id="msg-1",
+            session_id="test",
+            tool_name="shell",
+            input_json='{"command": ["bash", "-lc", "ls"], "env": {"A": "\\u00e9"}}',
+        )
+        lines = render_tool_call_toml(tool_call)
+        # Default json.dumps separators, matching previously rendered transcripts
+        assert 'command = "[\\"bash\\", \\"-lc\\", \\"ls\\"]"' in lines
+        parsed = tomllib.loads("\n".join(lines))
+        tool_input = parsed["turns"]["assistant"]["tool_calls"][0]["input"]
+        assert tool_input["command"] == '["bash", "-lc", "ls"]'
+        assert tool_input["env"] == '{"A": "\\u00e9"}'
+
+
 class TestRenderSessionToFile:
     def test_creates_file(self, sample_session):
         with tempfile.TemporaryDirectory() as tmpdir:
@@ -189,3 +266,14 @@ class TestRenderSessionToFile:
             result = render_session_to_file(sample_session, output_dir)
 
             assert result.parent.name == "test-project"
+
+    def test_filename_uses_start_date(self, sample_session):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            result = render_session_to_file(sample_session, Path(tmpdir))
+            assert result.name == f"{sample_session.started_at[:10]}-test-ses.toml"
+
+    def test_filename_without_start_date(self, sample_session):
+        session = replace(sample_session, started_at=None)
+        with tempfile.TemporaryDirectory() as tmpdir:
+            result = render_session_to_file(session, Path(tmpdir))
+            assert result.name == "unknown-date-test-ses.toml"